@@ -1,7 +1,14 @@
-﻿from fastapi import APIRouter
-from .endpoints import health, prediction, batch
+﻿from fastapi import APIRouter, Depends
+from .endpoints import health, prediction, batch, drift
+from ...core.profiling import profiling_enabled, profile_request
+from ...core.scheduler import scheduler
+
+# ครอบ handler ด้วย profiler เฉพาะเมื่อเปิดใช้งาน (ปิดอยู่ = ไม่มี overhead)
+profiling = [Depends(profile_request)] if profiling_enabled() else []
 
 router = APIRouter()
 router.include_router(health.router, tags=["Health"])
-router.include_router(prediction.router, tags=["Prediction"])
-router.include_router(batch.router, tags=["Batch"])
+router.include_router(prediction.router, tags=["Prediction"],
+                      dependencies=profiling + [Depends(scheduler.track_interactive)])
+router.include_router(batch.router, tags=["Batch"], dependencies=profiling)
+router.include_router(drift.router, tags=["Monitoring"])
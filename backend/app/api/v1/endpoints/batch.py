@@ -1,102 +1,235 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Dict, Any, Optional, Tuple
 import pandas as pd
 import io
+import os
+import re
+import tempfile
+from ....config import settings
+from ....core.scheduler import scheduler, BATCH
+from ....core.sharding import score_sharded
 from ....models.ml_model import predictor
+from ....models.schemas import BatchCohortResponse
 from ....utils.feature_engineering import FeatureEngineer
+from ....utils.batch_validation import missing_columns, validate_batch
+from ....utils.batch_whatif import required_gpa
+from ....utils.cohort_summary import CohortSummary
+from ....utils.result_cache import BatchResultCache
+from ....utils.report_export import iter_csv, iter_json, write_xlsx
 
 router = APIRouter()
 feature_engineer = FeatureEngineer()
+batch_cache = BatchResultCache(settings.BATCH_CACHE_DIR, settings.BATCH_CACHE_MAX_BYTES)
 
 
-def _read_dataframe(upload: UploadFile) -> pd.DataFrame:
-    filename = upload.filename or "uploaded"
-    content = upload.file.read()
+def _file_kind(filename: str) -> str:
+    filename = (filename or "uploaded").lower()
+    if filename.endswith(".xlsx") or filename.endswith(".xls"):
+        return "xlsx"
+    # try csv by default
+    return "csv"
+
+
+def _read_dataframe(content: bytes, kind: str) -> pd.DataFrame:
     try:
-        if filename.lower().endswith(".csv"):
-            return pd.read_csv(io.BytesIO(content))
-        elif filename.lower().endswith(".xlsx") or filename.lower().endswith(".xls"):
+        if kind == "xlsx":
             return pd.read_excel(io.BytesIO(content), engine="openpyxl")
-        else:
-            # try csv by default
-            return pd.read_csv(io.BytesIO(content))
+        return pd.read_csv(io.BytesIO(content))
     except Exception as e:
         raise HTTPException(400, f"Cannot parse file: {str(e)}")
 
 
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# รูปแบบผลของ batch-predict ใน cache (v2: มี cohort) -> ไม่ใช้ผลเก่าที่ไม่มี cohort
+PREDICT_FORMAT = "v2"
+RESULT_ID_PATTERN = re.compile(r"[0-9a-f]{64}_[\w.-]+")
+
+
+def _keep_headers(result: Response, response: Response) -> Response:
+    # FastAPI ไม่ใส่ header ที่ dependency ตั้งไว้ (เช่น X-Profile-Id) ให้ Response ที่ endpoint สร้างเอง
+    result.headers.update(response.headers)
+    return result
+
+
 @router.post("/batch-predict")
-async def batch_predict(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def batch_predict(response: Response, file: UploadFile = File(...)) -> StreamingResponse:
+    result_id, data, _ = await _batch_results(file)
+    # id ของผลใน cache ใช้ดึงสถิติรายกลุ่มภายหลังได้ที่ GET /batch-cohort/{result_id}
+    if result_id:
+        response.headers["X-Result-Id"] = result_id
+    # ผลลัพธ์ขนาดใหญ่: แปลงเป็น JSON ทีละช่วงนอก event loop และหยุดให้งาน interactive ระหว่างช่วง
+    return _keep_headers(
+        StreamingResponse(iter_json(data, scheduler.checkpoint), media_type="application/json"), response
+    )
+
+
+@router.post("/batch-cohort", response_model=BatchCohortResponse)
+async def batch_cohort(file: UploadFile = File(...)):
+    """
+    สถิติรายกลุ่ม (คณะ / เพศ / จำนวนเทอม) ของไฟล์เดียวกับ batch-predict โดยไม่ส่งผลรายแถวกลับ
+    ถ้าไฟล์นี้เคยทำนายแล้วจะตอบจาก cache โดยไม่ทำนายใหม่
+    """
+    entry = None
+    result_id = None
+    if settings.BATCH_CACHE_ENABLED and predictor.model_loaded:
+        content = await file.read()
+        result_id = _result_key(content, _file_kind(file.filename), PREDICT_FORMAT)
+        entry = await batch_cache.load(_cohort_key(result_id))
+    if entry is None:
+        await file.seek(0)
+        result_id, _, entry = await _batch_results(file)
+    return {"result_id": result_id, **entry}
+
+
+@router.get("/batch-cohort/{result_id}", response_model=BatchCohortResponse)
+async def batch_cohort_by_id(result_id: str):
+    """สถิติรายกลุ่มของผลที่เก็บใน cache (result_id จาก header X-Result-Id ของ batch-predict)"""
+    entry = await batch_cache.load(_cohort_key(result_id)) if RESULT_ID_PATTERN.fullmatch(result_id) else None
+    if entry is None:
+        raise HTTPException(404, "Result not found")
+    return {"result_id": result_id, **entry}
+
+
+def _cohort_key(result_id: str) -> str:
+    return f"{result_id}.cohort"
+
+
+def _cohort_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "count": data["count"],
+        "invalid_count": data["invalid_count"],
+        "cohort": data["cohort"]
+    }
+
+
+@router.post("/batch-export")
+async def batch_export(
+    response: Response,
+    file: UploadFile = File(...),
+    export_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$")
+):
+    """ส่งผลทำนายกลับเป็นไฟล์ XLSX (มีสีตามระดับความเสี่ยง) หรือ CSV แบบ streaming"""
+    _, data, _ = await _batch_results(file)
+
+    if export_format == "csv":
+        return _keep_headers(StreamingResponse(
+            iter_csv(data["results"], scheduler.checkpoint),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="dropout_predictions.csv"'}
+        ), response)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await scheduler.run(BATCH, write_xlsx, data["results"], data.get("errors", []), path, scheduler.checkpoint)
+    except Exception:
+        os.remove(path)
+        raise
+    return _keep_headers(FileResponse(
+        path,
+        media_type=XLSX_MEDIA_TYPE,
+        filename="dropout_predictions.xlsx",
+        background=BackgroundTask(os.remove, path)
+    ), response)
+
+
+@router.post("/batch-whatif")
+async def batch_whatif(
+    response: Response,
+    file: UploadFile = File(...),
+    threshold: float = Query(0.3, gt=0, le=1)
+) -> StreamingResponse:
+    """
+    GPA ขั้นต่ำในเทอมถัดไปของนักศึกษาแต่ละคนที่ทำให้ความน่าจะเป็นต่ำกว่า threshold
+    (ค่าเริ่มต้น 0.3 = ต่ำกว่าความเสี่ยงระดับ Medium)
+    """
+    _, data = await _run_batch(file, _whatif_content, threshold, variant=f"whatif{threshold!r}")
+    return _keep_headers(
+        StreamingResponse(iter_json(data, scheduler.checkpoint), media_type="application/json"), response
+    )
+
+
+async def _batch_results(file: UploadFile) -> Tuple[Optional[str], Dict[str, Any], Dict[str, Any]]:
+    """คืน (result_id, ผลรายแถวที่ไม่มี cohort, entry สถิติรายกลุ่ม)"""
+    result_id, data = await _run_batch(file, _predict_content, variant=PREDICT_FORMAT)
+    entry = _cohort_entry(data)
+    # สถิติรายกลุ่มเก็บแยกเป็น entry เล็ก ๆ ข้างผลเต็ม -> batch-cohort ไม่ต้อง parse ผลรายแถวทั้งหมด
+    if result_id and not batch_cache.contains(_cohort_key(result_id)):
+        await batch_cache.store(_cohort_key(result_id), entry)
+    # ผลเต็มใน cache ยังมี cohort ไว้สร้าง entry ใหม่ถ้าถูกลบ แต่ไม่ส่งกลับใน batch-predict / batch-export
+    # (สร้าง dict ใหม่ เพราะ request ที่รอผลเดียวกันใช้ dict เดียวกัน)
+    return result_id, {key: value for key, value in data.items() if key != "cohort"}, entry
+
+
+def _result_key(content: bytes, kind: str, variant: str = "") -> str:
+    # ไฟล์เดียวกัน + โมเดลเดียวกัน (+ พารามิเตอร์เดียวกัน) -> ผลลัพธ์เดียวกัน
+    return BatchResultCache.make_key(content, f"{kind}-{variant}" if variant else kind, predictor.model_version)
+
+
+async def _run_batch(file: UploadFile, compute, *args, variant: str = "") -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    อ่านไฟล์แล้วรัน compute(content, kind, *args) ใน batch lane ผ่าน cache
+    คืน (key ของผลใน cache หรือ None ถ้าปิด cache, ผลลัพธ์)
+    """
     if not predictor.model_loaded:
         raise HTTPException(503, "Model not loaded")
 
-    df = _read_dataframe(file)
+    content = await file.read()
+    kind = _file_kind(file.filename)
 
-    # Only required to column year4_term2, year5_term1/year5_term2 optional
-    required_cols = [
-        "faculty","gender","gpax","count_f",
-        "year1_term1","year1_term2","year2_term1","year2_term2",
-        "year3_term1","year3_term2","year4_term1","year4_term2"
-    ]
+    if not settings.BATCH_CACHE_ENABLED:
+        return None, await scheduler.run(BATCH, compute, content, kind, *args)
 
-    missing = [c for c in required_cols if c not in df.columns]
+    key = _result_key(content, kind, variant)
+    return key, await batch_cache.get_or_compute(
+        key, lambda: scheduler.run(BATCH, compute, content, kind, *args)
+    )
+
+
+def _validated_dataframe(content: bytes, kind: str):
+    df = _read_dataframe(content, kind)
+
+    missing = missing_columns(df)
     if missing:
         raise HTTPException(400, f"Missing columns: {', '.join(missing)}")
 
-    # Support batch with and without year5_term1/year5_term2
-    has_y5_1 = "year5_term1" in df.columns
-    has_y5_2 = "year5_term2" in df.columns
-
-    results: List[Dict[str, Any]] = []
-    for idx, row in df.iterrows():
-        term_gpas = [
-            row.get("year1_term1"), row.get("year1_term2"),
-            row.get("year2_term1"), row.get("year2_term2"),
-            row.get("year3_term1"), row.get("year3_term2"),
-            row.get("year4_term1"), row.get("year4_term2")
-        ]
-        # Optionally add year5
-        if has_y5_1:
-            term_gpas.append(row.get("year5_term1"))
-        if has_y5_2:
-            term_gpas.append(row.get("year5_term2"))
-
-        # normalize NaNs to None
-        term_gpas = [None if pd.isna(v) else float(v) for v in term_gpas]
-
-        current_term = max(1, min(len([g for g in term_gpas if g is not None]), 3))
-
-        features = feature_engineer.create_model_features(
-            faculty=str(row.get("faculty")),
-            gender=str(row.get("gender")),
-            gpax=float(row.get("gpax")),
-            count_f=int(row.get("count_f")),
-            term_gpas=term_gpas,
-            current_term=current_term
-        )
-
-        num_terms = len([g for g in term_gpas if g is not None])
-        pred, prob = predictor.predict(features, num_terms=num_terms)
-        risk, color = predictor.get_risk(prob)
-        explanations = feature_engineer.get_feature_explanation(features)
-        student_id = row.get("student_id") if "student_id" in df.columns else None
-        name = row.get("name") if "name" in df.columns else None
-
-        results.append({
-            "row_index": int(idx),
-            "student_id": None if pd.isna(student_id) else student_id,
-            "name": None if pd.isna(name) else name,
-            "prediction": int(pred),
-            "prediction_label": "Dropout" if pred == 1 else "Graduate",
-            "dropout_probability": float(prob),
-            "dropout_percentage": f"{prob*100:.1f}%",
-            "risk_level": risk,
-            "risk_color": color,
-            "feature_explanations": explanations,
-        })
+    # แถวที่ข้อมูลไม่ถูกต้องจะไม่ถูกนำไปทำนาย และรายงานกลับใน errors
+    return validate_batch(df, feature_engineer)
+
+
+def _whatif_content(content: bytes, kind: str, threshold: float) -> Dict[str, Any]:
+    clean_df, errors = _validated_dataframe(content, kind)
+    results = required_gpa(
+        clean_df, predictor, feature_engineer, threshold,
+        settings.SCHED_BATCH_SLICE_ROWS, scheduler.checkpoint
+    )
+
+    summary: Dict[str, int] = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
 
     return {
+        "threshold": threshold,
         "count": len(results),
-        "results": results
+        "summary": summary,
+        "results": results,
+        "invalid_count": len(errors),
+        "errors": errors
     }
 
 
+def _predict_content(content: bytes, kind: str) -> Dict[str, Any]:
+    clean_df, errors = _validated_dataframe(content, kind)
+    # สถิติรายกลุ่มสะสมไปพร้อมกับการทำนาย (ทีละ slice / shard) และเก็บไว้ในผลเดียวกันใน cache
+    cohort = CohortSummary(feature_engineer)
+    results = score_sharded(clean_df, cohort)
+
+    return {
+        "count": len(results),
+        "results": results,
+        "invalid_count": len(errors),
+        "errors": errors,
+        "cohort": cohort.to_dict()
+    }
@@ -0,0 +1,40 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from ....config import settings
+from ....core.drift import drift_monitor
+from ....models.ml_model import predictor
+from ....models.schemas import DriftReferenceInfo, DriftReport
+
+router = APIRouter()
+
+
+def _require_admin(token: Optional[str]):
+    # เปลี่ยน reference ได้เฉพาะเมื่อตั้ง DRIFT_ADMIN_TOKEN และ header ตรงกัน
+    if not settings.DRIFT_ADMIN_TOKEN or not token or not hmac.compare_digest(token, settings.DRIFT_ADMIN_TOKEN):
+        raise HTTPException(403, "Admin token required")
+
+
+@router.get("/drift", response_model=DriftReport)
+async def drift_report():
+    """PSI และ quantile ของ features จาก batch ที่ทำนายตั้งแต่เริ่ม live window เทียบกับ reference"""
+    return drift_monitor.report()
+
+
+@router.post("/drift/reference", response_model=DriftReferenceInfo)
+async def set_drift_reference(x_admin_token: Optional[str] = Header(None)):
+    """ใช้ข้อมูลใน live window ปัจจุบันเป็น reference ใหม่ (เช่น หลังเปลี่ยนโมเดล) แล้วเริ่ม window ใหม่"""
+    _require_admin(x_admin_token)
+    if drift_monitor.live.rows < settings.DRIFT_MIN_ROWS:
+        raise HTTPException(400, f"Need at least {settings.DRIFT_MIN_ROWS} rows in the live window")
+    return drift_monitor.promote_live(predictor.model_version)
+
+
+@router.post("/drift/reset")
+async def reset_drift(x_admin_token: Optional[str] = Header(None)):
+    """ล้าง live window (reference ไม่เปลี่ยน)"""
+    _require_admin(x_admin_token)
+    drift_monitor.reset()
+    return {"message": "Live window reset"}
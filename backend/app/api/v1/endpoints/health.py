@@ -1,6 +1,7 @@
 ﻿from fastapi import APIRouter
-from ....models.schemas import HealthResponse
+from ....models.schemas import HealthResponse, SchedulerStatsResponse
 from ....models.ml_model import predictor
+from ....core.scheduler import scheduler
 
 router = APIRouter()
 
@@ -15,6 +16,11 @@ async def health():
         loaded_count=loaded_count
     )
 
+@router.get("/scheduler", response_model=SchedulerStatsResponse)
+async def scheduler_stats():
+    """ความยาวคิวและเวลารอของแต่ละ lane (interactive / batch)"""
+    return SchedulerStatsResponse(lanes=scheduler.stats())
+
 @router.options("/health")
 async def health_options():
     return {"message": "OK"}
\ No newline at end of file
@@ -2,6 +2,7 @@
 from ....models.schemas import StudentInput, StudentBasicInput, PredictionOutput, FuturePredictionRequest, FuturePredictionOutput
 from ....models.ml_model import predictor
 from ....utils.feature_engineering import FeatureEngineer
+from ....core.scheduler import scheduler, INTERACTIVE
 
 router = APIRouter()
 feature_engineer = FeatureEngineer()
@@ -9,6 +10,9 @@ feature_engineer = FeatureEngineer()
 @router.post("/predict", response_model=PredictionOutput)
 async def predict(student: StudentInput):
     """ทำนายจาก features ที่ประมวลผลแล้ว"""
+    return await scheduler.run(INTERACTIVE, _predict, student)
+
+def _predict(student: StudentInput):
     if not predictor.model_loaded:
         raise HTTPException(503, "Model not loaded")
     
@@ -29,6 +33,9 @@ async def predict(student: StudentInput):
 @router.post("/predict-from-basic", response_model=PredictionOutput)
 async def predict_from_basic(student_basic: StudentBasicInput):
     """ทำนายจากข้อมูลพื้นฐาน"""
+    return await scheduler.run(INTERACTIVE, _predict_from_basic, student_basic)
+
+def _predict_from_basic(student_basic: StudentBasicInput):
     if not predictor.model_loaded:
         raise HTTPException(503, "Model not loaded")
     
@@ -88,6 +95,9 @@ async def predict_from_basic(student_basic: StudentBasicInput):
 @router.post("/predict-future", response_model=FuturePredictionOutput)
 async def predict_future(request: FuturePredictionRequest):
     """ทำนายผลลัพธ์หากเกรดเทอมถัดไปเป็นตามที่กำหนด"""
+    return await scheduler.run(INTERACTIVE, _predict_future, request)
+
+def _predict_future(request: FuturePredictionRequest):
     if not predictor.model_loaded:
         raise HTTPException(503, "Model not loaded")
     
@@ -1,12 +1,71 @@
-﻿from pydantic_settings import BaseSettings
+﻿from pathlib import Path
+from typing import Union
+from pydantic_settings import BaseSettings
+
+# โฟลเดอร์ /app (backend) ที่มี XG/, cache/, logs/
+APP_DIR = Path(__file__).parent.parent
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Dropout Prediction API"
     VERSION: str = "1.0.0"
     DEBUG: bool = True
+
+    # Model files (relative to /app); point at a compacted model from app.tools.compact_model to use it
+    MODEL_TERM1_PATH: str = "XG/model_term1.json"
+    MODEL_TERM2_PATH: str = "XG/model_term2.json"
+    MODEL_TERM3_PATH: str = "XG/model_term3.json"
+
+    # Batch result cache (keyed by file digest + model version)
+    BATCH_CACHE_ENABLED: bool = True
+    BATCH_CACHE_DIR: str = "cache/batch"
+    BATCH_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Precomputed term1 risk table (replaces term1 booster calls with array lookup)
+    TERM1_TABLE_ENABLED: bool = False
+    TERM1_TABLE_PATH: str = "XG/term1_table.npz"
+    TERM1_TABLE_BUILD_ON_STARTUP: bool = False
+    TERM1_TABLE_MAX_COUNT_F: int = 3
+    TERM1_TABLE_PARITY_SAMPLES: int = 2000
+    TERM1_TABLE_PARITY_TOLERANCE: float = 1e-6
+
+    # Per-request profiling (off unless a sampling rate or admin token is set)
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_ADMIN_TOKEN: str = ""
+    PROFILE_DIR: str = "logs/profiles"
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_FILES: int = 200
+
+    # Sharded batch scoring across processes (0 workers = CPU cores - 1, one core stays free for interactive work)
+    BATCH_SHARD_WORKERS: int = 0
+    # Added to the niceness of shard workers so the API process wins the CPU when both are busy
+    BATCH_SHARD_NICE: int = 10
+    BATCH_SHARD_SIZE: int = 10000
+    BATCH_SHARD_MIN_ROWS: int = 20000
+
+    # Priority lanes: interactive predictions get reserved threads, batch work yields between slices
+    SCHED_INTERACTIVE_WORKERS: int = 4
+    SCHED_INTERACTIVE_BUDGET_MS: float = 200.0
+    SCHED_BATCH_WORKERS: int = 2
+    SCHED_BATCH_SLICE_ROWS: int = 2000
+    SCHED_MAX_YIELD_MS: float = 250.0
+
+    # Feature drift monitoring (fixed-size sketches of batch features vs a stored reference)
+    DRIFT_ENABLED: bool = True
+    DRIFT_REFERENCE_PATH: str = "XG/drift_reference.json"
+    DRIFT_ADMIN_TOKEN: str = ""
+    DRIFT_MIN_ROWS: int = 500
+    DRIFT_PSI_BINS: int = 10
+    DRIFT_PSI_WARN: float = 0.1
+    DRIFT_PSI_ALERT: float = 0.25
     
     class Config:
         case_sensitive = True
 
 settings = Settings()
+
+
+def resolve_app_path(path: Union[str, Path]) -> Path:
+    """path ใน settings / argument ของเครื่องมือ: ถ้าไม่ใช่ absolute จะอ้างอิงจากโฟลเดอร์ /app"""
+    path = Path(path)
+    return path if path.is_absolute() else APP_DIR / path
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..config import settings, resolve_app_path
+from ..utils.feature_sketch import FeatureSketch, SKETCH_FEATURES
+
+# ลำดับความรุนแรงของสถานะ ใช้เลือกสถานะรวมที่แย่ที่สุด
+STATUS_ORDER = ["no_reference", "insufficient_data", "stable", "moderate", "significant"]
+
+
+class DriftMonitor:
+    """
+    เก็บ sketch ของ features จากทุก batch ที่ทำนาย (live) แล้วเทียบกับ reference ที่บันทึกไว้
+    reference เป็นไฟล์ JSON เล็ก ๆ (ไม่กี่ KB) สร้างจาก live window หรือจาก app.tools.build_drift_reference
+    """
+
+    def __init__(self, reference_path: str):
+        self.reference_path = resolve_app_path(reference_path)
+        self.reference: Optional[FeatureSketch] = None
+        self.reference_info: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._reset_live()
+
+    def _reset_live(self):
+        self.live = FeatureSketch()
+        self.live_batches = 0
+        self.live_since = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def load_reference(self) -> bool:
+        try:
+            with open(self.reference_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            print(f"ℹ️ No drift reference at {self.reference_path}")
+            return False
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Cannot load drift reference: {e}")
+            return False
+
+        with self._lock:
+            self.reference = FeatureSketch.from_dict(payload["sketch"])
+            self.reference_info = {k: v for k, v in payload.items() if k != "sketch"}
+        print(f"✅ Loaded drift reference ({self.reference.rows} rows)")
+        return True
+
+    def save_reference(self, sketch: FeatureSketch, model_version: Optional[str]) -> Dict[str, Any]:
+        info = {
+            "rows": sketch.rows,
+            "model_version": model_version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.reference_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.reference_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**info, "sketch": sketch.to_dict()}, f)
+        os.replace(tmp_path, self.reference_path)
+
+        with self._lock:
+            self.reference = sketch
+            self.reference_info = info
+        return info
+
+    def observe(self, sketch: FeatureSketch) -> None:
+        """รวม sketch ของหนึ่ง batch เข้ากับ live window"""
+        if sketch.rows == 0:
+            return
+        with self._lock:
+            self.live.merge(sketch)
+            self.live_batches += 1
+
+    def promote_live(self, model_version: Optional[str]) -> Dict[str, Any]:
+        """ใช้ข้อมูล live ปัจจุบันเป็น reference ใหม่ แล้วเริ่ม live window ใหม่"""
+        with self._lock:
+            sketch = self.live
+            self._reset_live()
+        return self.save_reference(sketch, model_version)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset_live()
+
+    def _status(self, psi: Optional[float]) -> str:
+        if self.reference is None:
+            return "no_reference"
+        if psi is None or self.live.rows < settings.DRIFT_MIN_ROWS:
+            return "insufficient_data"
+        if psi >= settings.DRIFT_PSI_ALERT:
+            return "significant"
+        if psi >= settings.DRIFT_PSI_WARN:
+            return "moderate"
+        return "stable"
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            features = {}
+            for name in SKETCH_FEATURES:
+                psi = None
+                if self.reference is not None:
+                    psi = self.live.psi(self.reference, name, settings.DRIFT_PSI_BINS)
+                features[name] = {
+                    "psi": psi,
+                    "status": self._status(psi),
+                    "live": self.live.summary(name),
+                    "reference": self.reference.summary(name) if self.reference is not None else None,
+                }
+
+            return {
+                "status": max((f["status"] for f in features.values()), key=STATUS_ORDER.index),
+                "live_rows": self.live.rows,
+                "live_batches": self.live_batches,
+                "live_since": self.live_since,
+                "reference": self.reference_info or None,
+                "features": features,
+            }
+
+
+drift_monitor = DriftMonitor(settings.DRIFT_REFERENCE_PATH)
@@ -0,0 +1,153 @@
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional, Set
+
+from fastapi import Request, Response
+
+from ..config import settings, resolve_app_path
+
+# frame ชั้นในสุดของ thread ที่ว่างอยู่ (event loop รอ I/O, thread pool รองาน) ไม่นับเป็น sample
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# โปรไฟล์ได้ครั้งละหนึ่ง request
+_profile_lock = threading.Lock()
+# sampler ของ request ที่กำลังถูกโปรไฟล์ (scheduler.run ใช้ลงทะเบียน thread ที่ทำงานให้ request นี้)
+_active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+
+def profiling_enabled() -> bool:
+    return settings.PROFILE_SAMPLE_RATE > 0 or bool(settings.PROFILE_ADMIN_TOKEN)
+
+
+def current_sampler() -> Optional["StackSampler"]:
+    return _active_sampler.get()
+
+
+class StackSampler:
+    """
+    Sampling profiler: เก็บ call stack ของ thread ที่ลงทะเบียนไว้ (track) ทุก interval วินาที
+    บันทึกเป็น folded stacks ("a;b;c count") ที่ flamegraph.pl / speedscope / inferno อ่านได้
+    งานของ request ที่ถูกส่งไป thread ของ scheduler ก็ถูกเก็บด้วย (cProfile เก็บได้เฉพาะ thread ที่เรียก enable)
+    ส่วนงานของ request อื่นใน thread อื่นไม่ถูกนับ
+    stack จาก process อื่น (worker ของ shard pool) รวมเข้ามาได้ด้วย merge()
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._threads: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def track(self, thread_id: int):
+        self._threads.add(thread_id)
+
+    def untrack(self, thread_id: int):
+        self._threads.discard(thread_id)
+
+    def merge(self, samples: Counter, root: str):
+        """รวม folded stacks จาก sampler อื่น โดยเปลี่ยนชื่อ thread (ชั้นแรกของ stack) เป็น root"""
+        with self._lock:
+            for stack, count in samples.items():
+                self.samples[root + ";" + stack.split(";", 1)[-1]] += count
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in set(self._threads):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(thread_id, str(thread_id)))
+                with self._lock:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.items():
+                f.write(f"{stack} {count}\n")
+
+
+def _should_profile(request: Request) -> bool:
+    token = request.headers.get("X-Profile")
+    if token and settings.PROFILE_ADMIN_TOKEN:
+        if hmac.compare_digest(token, settings.PROFILE_ADMIN_TOKEN):
+            return True
+    return random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def _prune(directory: Path):
+    files = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+    excess = len(files) - settings.PROFILE_MAX_FILES
+    for path in files[:max(excess, 0)]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+async def profile_request(request: Request, response: Response):
+    """
+    Dependency ที่ครอบ handler: ถ้า request ถูกเลือก (header X-Profile ตรงกับ PROFILE_ADMIN_TOKEN
+    หรือสุ่มตาม PROFILE_SAMPLE_RATE) จะเก็บ profile ลง PROFILE_DIR (โฟลเดอร์ logs)
+    """
+    if not _should_profile(request) or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{re.sub(r'[^A-Za-z0-9]+', '-', request.url.path).strip('-')}_{uuid.uuid4().hex[:8]}"
+    response.headers["X-Profile-Id"] = profile_id
+    sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+    # event loop (parse, validate, serialize) + thread ของ scheduler ที่รับงานของ request นี้
+    sampler.track(threading.get_ident())
+    _active_sampler.set(sampler)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+        try:
+            directory = resolve_app_path(settings.PROFILE_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            sampler.write(directory / f"{profile_id}.folded")
+            _prune(directory)
+            print(f"🔬 Profiled {request.url.path} in {elapsed:.3f}s -> {profile_id}.folded")
+        except OSError as e:
+            print(f"⚠️ Cannot write profile {profile_id}: {e}")
+        finally:
+            _profile_lock.release()
@@ -0,0 +1,152 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from ..config import settings
+from .profiling import current_sampler
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class Lane:
+    """คิวงานหนึ่งระดับความสำคัญ: มี thread ของตัวเอง และเก็บสถิติการรอ"""
+
+    def __init__(self, name: str, workers: int, budget_ms: Optional[float] = None):
+        self.name = name
+        self.workers = workers
+        self.budget_ms = budget_ms
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-lane")
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.over_budget = 0
+        self.yields = 0
+        self.waits = deque(maxlen=1000)
+
+    def stats(self) -> Dict[str, Any]:
+        waits_ms = np.array(self.waits) * 1000 if self.waits else np.zeros(1)
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "wait_ms_avg": float(waits_ms.mean()),
+            "wait_ms_p99": float(np.percentile(waits_ms, 99)),
+            "latency_budget_ms": self.budget_ms,
+            "over_budget": self.over_budget,
+            "yields": self.yields,
+        }
+
+
+class PriorityScheduler:
+    """
+    แยกงาน interactive (ทำนายรายคน) กับงาน batch ออกเป็นสอง lane
+    - interactive มี thread สำรองของตัวเอง ไม่ต้องรอคิวกับ batch
+    - batch ทำเป็นช่วง ๆ (slice) และเรียก checkpoint() ระหว่างช่วง
+      ถ้ามีงาน interactive ค้างอยู่ batch จะหยุดรอ (ไม่เกิน SCHED_MAX_YIELD_MS) เพื่อคืน CPU/GIL ให้ก่อน
+    """
+
+    def __init__(self):
+        self.lanes = {
+            INTERACTIVE: Lane(INTERACTIVE, settings.SCHED_INTERACTIVE_WORKERS,
+                              settings.SCHED_INTERACTIVE_BUDGET_MS),
+            BATCH: Lane(BATCH, settings.SCHED_BATCH_WORKERS),
+        }
+        self.max_yield = settings.SCHED_MAX_YIELD_MS / 1000
+        self._lock = threading.Lock()
+        self._interactive_idle = threading.Condition(self._lock)
+        self._interactive_pending = 0
+
+    async def run(self, lane_name: str, fn: Callable, *args) -> Any:
+        lane = self.lanes[lane_name]
+        submitted = time.perf_counter()
+        with self._lock:
+            lane.queued += 1
+            if lane_name == INTERACTIVE:
+                self._interactive_pending += 1
+
+        started = False
+        released = False
+        sampler = current_sampler()
+        # run_in_executor ไม่ส่ง contextvars ไปยัง thread เอง -> รัน task ใน context ของ request
+        # (งานใน lane จึงเรียก current_sampler() ได้ เช่น score_sharded)
+        context = contextvars.copy_context()
+
+        def release():
+            # เรียกขณะถือ self._lock; นับงาน interactive ที่ค้างอยู่ลดลงครั้งเดียวต่องาน
+            nonlocal released
+            if released:
+                return
+            released = True
+            if lane_name == INTERACTIVE:
+                self._interactive_pending -= 1
+                if self._interactive_pending == 0:
+                    self._interactive_idle.notify_all()
+
+        def task():
+            nonlocal started
+            with self._lock:
+                started = True
+                lane.queued -= 1
+                lane.running += 1
+                lane.waits.append(time.perf_counter() - submitted)
+            if sampler is not None:
+                sampler.track(threading.get_ident())
+            try:
+                return fn(*args)
+            finally:
+                if sampler is not None:
+                    sampler.untrack(threading.get_ident())
+                with self._lock:
+                    lane.running -= 1
+                    lane.completed += 1
+                    release()
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(lane.executor, context.run, task)
+        finally:
+            elapsed_ms = (time.perf_counter() - submitted) * 1000
+            with self._lock:
+                if not started:
+                    # ถูกยกเลิกก่อนได้เริ่มทำงาน
+                    lane.queued -= 1
+                elif lane.budget_ms is not None and elapsed_ms > lane.budget_ms:
+                    lane.over_budget += 1
+                release()
+
+    async def track_interactive(self):
+        """
+        Dependency ของ router interactive: นับทั้ง request (parse, validate, serialize) เป็นงานที่ค้างอยู่
+        batch จึงหยุดที่ checkpoint ถัดไปตลอดช่วงที่ request นี้ยังไม่เสร็จ
+        """
+        with self._lock:
+            self._interactive_pending += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._interactive_pending -= 1
+                if self._interactive_pending == 0:
+                    self._interactive_idle.notify_all()
+
+    def checkpoint(self):
+        """เรียกจากงาน batch ระหว่าง slice: รอจนงาน interactive ที่ค้างอยู่เสร็จ"""
+        if self._interactive_pending == 0:
+            return
+        with self._lock:
+            self.lanes[BATCH].yields += 1
+            self._interactive_idle.wait_for(lambda: self._interactive_pending == 0, timeout=self.max_yield)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: lane.stats() for name, lane in self.lanes.items()}
+
+
+scheduler = PriorityScheduler()
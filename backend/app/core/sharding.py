@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..config import settings
+from ..models.ml_model import predictor
+from ..utils.batch_scoring import score_students
+from ..utils.cohort_summary import CohortSummary
+from ..utils.feature_engineering import FeatureEngineer
+from ..utils.feature_sketch import FeatureSketch
+from .drift import drift_monitor
+from .profiling import StackSampler, current_sampler
+from .scheduler import scheduler
+
+feature_engineer = FeatureEngineer()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def shard_workers() -> int:
+    # เว้นหนึ่ง core ให้ process หลัก (event loop + interactive lane) เพราะ shard ที่ส่งไปแล้วไม่หยุดที่ checkpoint
+    return settings.BATCH_SHARD_WORKERS or max((os.cpu_count() or 1) - 1, 1)
+
+
+def _init_worker():
+    """โหลดโมเดลครั้งเดียวต่อ process แล้วใช้ซ้ำกับทุก shard"""
+    if settings.BATCH_SHARD_NICE and hasattr(os, "nice"):
+        os.nice(settings.BATCH_SHARD_NICE)
+    predictor.load_models()
+    predictor.load_term1_table()
+    # แต่ละ process ใช้ 1 thread ไม่ให้แย่ง core กันเอง
+    for model in predictor.models.values():
+        if model is not None:
+            model.get_booster().set_param({"nthread": 1})
+
+
+def _score_shard(
+    shard: pd.DataFrame,
+    profile_interval: Optional[float] = None
+) -> Tuple[List[Dict[str, Any]], FeatureSketch, CohortSummary, Optional[Counter]]:
+    # sketch, สถิติรายกลุ่ม และ stack ที่ profiler เก็บใน worker ถูกส่งกลับมารวมใน process หลัก
+    sketch = FeatureSketch()
+    cohort = CohortSummary(feature_engineer)
+    sampler = None
+    if profile_interval is not None:
+        sampler = StackSampler(profile_interval)
+        sampler.track(threading.get_ident())
+        sampler.start()
+    try:
+        results = score_students(shard, predictor, feature_engineer, sketch, cohort)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+    return results, sketch, cohort, sampler.samples if sampler is not None else None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn แทน fork: process ลูกไม่สืบทอด thread/OpenMP state ของ XGBoost จาก process หลัก
+        _pool = ProcessPoolExecutor(
+            max_workers=shard_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+    return _pool
+
+
+def _worker_ready():
+    return None
+
+
+def warm_pool():
+    """
+    สร้าง process pool ตอนเริ่ม app: spawn ทุก worker และโหลดโมเดล (และตาราง term1) ไว้ก่อน
+    upload ใหญ่ครั้งแรกจึงไม่ต้องรอ
+    """
+    workers = shard_workers()
+    if workers <= 1:
+        return
+    pool = _get_pool()
+    # งานเปล่าหนึ่งงานต่อ worker -> pool spawn ครบทุก process (initializer ทำงานพร้อมกัน)
+    for future in [pool.submit(_worker_ready) for _ in range(workers)]:
+        future.result()
+    print(f"✅ Shard pool ready: {workers} workers")
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def score_sharded(df: pd.DataFrame, cohort: Optional[CohortSummary] = None) -> List[Dict[str, Any]]:
+    """
+    ทำนาย DataFrame ที่ผ่าน validate_batch แล้ว
+    ถ้าจำนวนแถวถึง BATCH_SHARD_MIN_ROWS จะแบ่งเป็น shard ละ BATCH_SHARD_SIZE แถว
+    ส่งให้ process pool ทำพร้อมกัน แล้วต่อผลลัพธ์กลับตามลำดับเดิม
+    features ของทั้ง batch ถูกรวมเป็น sketch เดียวแล้วส่งให้ drift_monitor
+    และถ้าส่ง cohort มา จะรวมสถิติรายกลุ่มของทุกแถวไว้ใน cohort
+    """
+    results: List[Dict[str, Any]] = []
+    sketch = FeatureSketch() if settings.DRIFT_ENABLED else None
+    workers = shard_workers()
+    if workers <= 1 or len(df) < settings.BATCH_SHARD_MIN_ROWS:
+        # ทำใน process นี้ทีละ slice และหยุดให้งาน interactive ระหว่าง slice
+        slice_rows = settings.SCHED_BATCH_SLICE_ROWS
+        for start in range(0, len(df), slice_rows):
+            scheduler.checkpoint()
+            results.extend(score_students(df.iloc[start:start + slice_rows], predictor, feature_engineer, sketch, cohort))
+        if sketch is not None:
+            drift_monitor.observe(sketch)
+        return results
+
+    # อย่างน้อยหนึ่ง shard ต่อ worker
+    shard_size = max(1, min(settings.BATCH_SHARD_SIZE, -(-len(df) // workers)))
+    shards = [df.iloc[start:start + shard_size] for start in range(0, len(df), shard_size)]
+
+    # ส่ง shard ครั้งละไม่เกินจำนวน worker (ส่ง shard ถัดไปหลัง checkpoint)
+    pool = _get_pool()
+    pending = deque()
+    # request ที่ถูกโปรไฟล์: thread นี้แค่รอผล จึงให้ worker เก็บ stack ของตัวเองแล้วรวมเข้า profile
+    request_sampler = current_sampler()
+    profile_interval = request_sampler.interval if request_sampler is not None else None
+
+    def collect():
+        shard_results, shard_sketch, shard_cohort, shard_samples = pending.popleft().result()
+        if shard_samples:
+            request_sampler.merge(shard_samples, "shard-worker")
+        results.extend(shard_results)
+        if sketch is not None:
+            sketch.merge(shard_sketch)
+        if cohort is not None:
+            cohort.merge(shard_cohort)
+
+    for shard in shards:
+        if len(pending) >= workers:
+            collect()
+        scheduler.checkpoint()
+        pending.append(pool.submit(_score_shard, shard, profile_interval))
+    while pending:
+        collect()
+
+    if sketch is not None:
+        drift_monitor.observe(sketch)
+    return results
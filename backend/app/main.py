@@ -4,13 +4,21 @@ from contextlib import asynccontextmanager
 from .config import settings
 from .api.v1.api import router as api_router
 from .models.ml_model import predictor
+from .core.sharding import shutdown_pool, warm_pool
+from .core.drift import drift_monitor
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting up...")
     predictor.load_models()
+    predictor.load_term1_table()
+    if settings.DRIFT_ENABLED:
+        drift_monitor.load_reference()
+    if predictor.model_loaded:
+        warm_pool()
     yield
     print("Shutting down...")
+    shutdown_pool()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -28,6 +36,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Result-Id"],
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
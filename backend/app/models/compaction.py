@@ -0,0 +1,270 @@
+import copy
+import json
+import math
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import xgboost as xgb
+
+from .ml_model import RISK_EDGES
+
+# parent ของ root node ในไฟล์ JSON ของ XGBoost
+ROOT_PARENT = 2147483647
+
+
+def risk_bands(probs: np.ndarray) -> np.ndarray:
+    return np.digitize(probs, RISK_EDGES)
+
+
+def load_model_json(path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dumps_model(model: Dict[str, Any]) -> bytes:
+    return json.dumps(model, separators=(",", ":")).encode("utf-8")
+
+
+def classifier_from_json(model: Dict[str, Any]) -> xgb.XGBClassifier:
+    clf = xgb.XGBClassifier()
+    clf.load_model(bytearray(dumps_model(model)))
+    return clf
+
+
+def _trees(model: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return model["learner"]["gradient_booster"]["model"]["trees"]
+
+
+def model_stats(model: Dict[str, Any]) -> Dict[str, int]:
+    trees = _trees(model)
+    return {
+        "trees": len(trees),
+        "nodes": sum(int(t["tree_param"]["num_nodes"]) for t in trees),
+        "bytes": len(dumps_model(model)),
+    }
+
+
+def base_margin(model: Dict[str, Any]) -> float:
+    """base_score ของ binary:logistic เก็บเป็นความน่าจะเป็น เช่น "[5E-1]" -> แปลงเป็น margin"""
+    base_score = float(model["learner"]["learner_model_param"]["base_score"].strip("[]"))
+    return math.log(base_score / (1 - base_score))
+
+
+def truncate(model: Dict[str, Any], num_trees: int, bias: float = 0.0) -> Dict[str, Any]:
+    """
+    เก็บเฉพาะ num_trees ต้นแรก (ตามลำดับ boosting)
+    bias (margin) ถูกบวกเข้า base_score เพื่อชดเชยค่าเฉลี่ยของต้นไม้ที่ถูกตัดออก
+    """
+    model = copy.deepcopy(model)
+    gbtree = model["learner"]["gradient_booster"]["model"]
+    gbtree["trees"] = gbtree["trees"][:num_trees]
+    gbtree["tree_info"] = gbtree["tree_info"][:num_trees]
+    gbtree["iteration_indptr"] = list(range(num_trees + 1))
+    gbtree["gbtree_model_param"]["num_trees"] = str(num_trees)
+
+    if bias:
+        margin = base_margin(model) + bias
+        base_score = 1 / (1 + math.exp(-margin))
+        model["learner"]["learner_model_param"]["base_score"] = f"[{base_score:.8E}]"
+    return model
+
+
+class _Node:
+    __slots__ = ("feature", "threshold", "default_left", "left", "right", "value", "gain", "hessian", "weight", "reach")
+
+    def is_leaf(self) -> bool:
+        return self.left is None
+
+    def key(self) -> Tuple:
+        """ใช้เทียบว่า subtree สองฝั่งเหมือนกันทุกประการหรือไม่"""
+        if self.is_leaf():
+            return ("leaf", self.value)
+        return (self.feature, self.threshold, self.default_left, self.left.key(), self.right.key())
+
+
+def node_reach(tree: Dict[str, Any], features: np.ndarray) -> np.ndarray:
+    """จำนวนแถวของ features ที่ผ่านแต่ละ node (เดินทุกแถวพร้อมกันทีละระดับ)"""
+    left = np.asarray(tree["left_children"])
+    right = np.asarray(tree["right_children"])
+    split_index = np.asarray(tree["split_indices"])
+    threshold = np.asarray(tree["split_conditions"])
+    default_left = np.asarray(tree["default_left"]) == 1
+
+    reach = np.zeros(len(left), dtype=np.int64)
+    rows = np.arange(len(features))
+    node = np.zeros(len(features), dtype=np.int64)
+    while len(rows):
+        np.add.at(reach, node, 1)
+        internal = left[node] != -1
+        rows, node = rows[internal], node[internal]
+        x = features[rows, split_index[node]]
+        go_left = np.where(np.isnan(x), default_left[node], x < threshold[node])
+        node = np.where(go_left, left[node], right[node])
+    return reach
+
+
+def _read_tree(tree: Dict[str, Any], nid: int = 0, reach: Optional[np.ndarray] = None) -> _Node:
+    node = _Node()
+    node.reach = None if reach is None else int(reach[nid])
+    node.gain = tree["loss_changes"][nid]
+    node.hessian = tree["sum_hessian"][nid]
+    node.weight = tree["base_weights"][nid]
+    left = tree["left_children"][nid]
+    if left == -1:
+        node.left = node.right = None
+        node.feature, node.threshold, node.default_left = 0, 0.0, 0
+        node.value = tree["split_conditions"][nid]
+        return node
+    node.feature = tree["split_indices"][nid]
+    node.threshold = tree["split_conditions"][nid]
+    node.default_left = tree["default_left"][nid]
+    node.value = None
+    node.left = _read_tree(tree, left, reach)
+    node.right = _read_tree(tree, tree["right_children"][nid], reach)
+    return node
+
+
+def _simplify(node: _Node, bounds: Dict[int, Tuple[float, float, bool]], leaf_tolerance: float) -> _Node:
+    """
+    ตัด node ที่ไม่มีผล (ผลลัพธ์เท่าเดิมทุก input ยกเว้น leaf_tolerance > 0):
+    - dead branch: เงื่อนไขของ ancestor บังคับทิศทางของ split นี้อยู่แล้ว (รวมถึง split ซ้ำกับ ancestor)
+    - split ที่ subtree ทั้งสองฝั่งเหมือนกัน -> เหลือฝั่งเดียว
+    - (ทางเลือก) split ที่ลูกเป็น leaf ทั้งคู่และค่าต่างกันไม่เกิน leaf_tolerance -> รวมเป็น leaf เดียว
+    - (ทางเลือก เมื่ออ่าน tree พร้อม reach) กิ่งที่ไม่มีแถวใน reference ผ่านเลย -> เหลือแต่กิ่งอีกฝั่ง
+    bounds[feature] = (lo, hi, may_be_missing): ค่าที่ไปถึง node นี้ได้คือ lo <= x < hi หรือ missing
+    """
+    if node.is_leaf():
+        return node
+
+    lo, hi, may_be_missing = bounds.get(node.feature, (-math.inf, math.inf, True))
+    # XGBoost: x < threshold ไปซ้าย, missing ไปตาม default_left
+    always_left = hi <= node.threshold and (not may_be_missing or node.default_left)
+    always_right = lo >= node.threshold and (not may_be_missing or not node.default_left)
+    if always_left:
+        return _simplify(node.left, bounds, leaf_tolerance)
+    if always_right:
+        return _simplify(node.right, bounds, leaf_tolerance)
+    if node.left.reach == 0:
+        return _simplify(node.right, bounds, leaf_tolerance)
+    if node.right.reach == 0:
+        return _simplify(node.left, bounds, leaf_tolerance)
+
+    # ฝั่งซ้าย: x < threshold หรือ missing ถ้า default_left ; ฝั่งขวา: x >= threshold หรือ missing ถ้าไม่ใช่
+    left_bounds = dict(bounds)
+    left_bounds[node.feature] = (lo, min(hi, node.threshold), may_be_missing and bool(node.default_left))
+    right_bounds = dict(bounds)
+    right_bounds[node.feature] = (max(lo, node.threshold), hi, may_be_missing and not node.default_left)
+    node.left = _simplify(node.left, left_bounds, leaf_tolerance)
+    node.right = _simplify(node.right, right_bounds, leaf_tolerance)
+
+    if node.left.key() == node.right.key():
+        return node.left
+    if leaf_tolerance > 0 and node.left.is_leaf() and node.right.is_leaf():
+        if abs(node.left.value - node.right.value) <= leaf_tolerance:
+            total = node.left.hessian + node.right.hessian
+            merged = node.left
+            merged.value = (node.left.value * node.left.hessian + node.right.value * node.right.hessian) / total
+            merged.weight = merged.value
+            merged.hessian = total
+            return merged
+    return node
+
+
+def _write_tree(root: _Node, tree_id: int, num_feature: str) -> Dict[str, Any]:
+    """เขียน tree กลับเป็นรูปแบบ JSON ของ XGBoost (เรียง node id แบบ BFS เหมือนที่ XGBoost สร้าง)"""
+    order: List[_Node] = []
+    parents: List[int] = []
+    queue = deque([(root, ROOT_PARENT)])
+    while queue:
+        node, parent = queue.popleft()
+        order.append(node)
+        parents.append(parent)
+        if not node.is_leaf():
+            nid = len(order) - 1
+            queue.append((node.left, nid))
+            queue.append((node.right, nid))
+
+    ids = {id(node): i for i, node in enumerate(order)}
+    tree = {
+        "base_weights": [], "categories": [], "categories_nodes": [],
+        "categories_segments": [], "categories_sizes": [], "default_left": [],
+        "id": tree_id, "left_children": [], "loss_changes": [], "parents": parents,
+        "right_children": [], "split_conditions": [], "split_indices": [],
+        "split_type": [], "sum_hessian": [],
+        "tree_param": {
+            "num_deleted": "0", "num_feature": num_feature,
+            "num_nodes": str(len(order)), "size_leaf_vector": "1"
+        },
+    }
+    for node in order:
+        leaf = node.is_leaf()
+        tree["left_children"].append(-1 if leaf else ids[id(node.left)])
+        tree["right_children"].append(-1 if leaf else ids[id(node.right)])
+        tree["split_indices"].append(node.feature)
+        tree["split_conditions"].append(node.value if leaf else node.threshold)
+        tree["default_left"].append(node.default_left)
+        tree["split_type"].append(0)
+        tree["base_weights"].append(node.weight)
+        tree["loss_changes"].append(0.0 if leaf else node.gain)
+        tree["sum_hessian"].append(node.hessian)
+    return tree
+
+
+def simplify_trees(
+    model: Dict[str, Any],
+    leaf_tolerance: float = 0.0,
+    coverage: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    ตัด dead branch และ split ซ้ำซ้อนในทุก tree
+    ไม่เปลี่ยนผลทำนายถ้า leaf_tolerance = 0 และไม่ส่ง coverage
+    coverage: features (ndarray ตามลำดับ feature ของโมเดล) ใช้ตัดกิ่งที่ไม่มีข้อมูลผ่าน
+    ซึ่งเปลี่ยนผลได้เฉพาะ input ที่อยู่นอกขอบเขตของ coverage
+    """
+    model = copy.deepcopy(model)
+    trees = _trees(model)
+    for i, tree in enumerate(trees):
+        if tree["categories"]:
+            # ไม่รองรับ categorical split ให้คงไว้ตามเดิม
+            continue
+        reach = node_reach(tree, coverage) if coverage is not None else None
+        root = _simplify(_read_tree(tree, reach=reach), {}, leaf_tolerance)
+        trees[i] = _write_tree(root, tree["id"], tree["tree_param"]["num_feature"])
+    return model
+
+
+def fidelity(reference: np.ndarray, probs: np.ndarray) -> Dict[str, float]:
+    error = np.abs(probs - reference)
+    return {
+        "max_error": float(error.max()),
+        "mean_error": float(error.mean()),
+        "band_disagreement": float(np.mean(risk_bands(probs) != risk_bands(reference))),
+        "label_flips": int(np.sum((probs > 0.5) != (reference > 0.5))),
+    }
+
+
+def truncation_curve(
+    clf: xgb.XGBClassifier,
+    features,
+    bias_correction: bool = True
+) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+    """
+    fidelity ของการเก็บ k ต้นแรก (k = 1..จำนวนต้นไม้) เทียบกับโมเดลเต็ม บน reference features
+    คืน (bias ของแต่ละ k, fidelity ของแต่ละ k)
+    """
+    booster = clf.get_booster()
+    dmatrix = xgb.DMatrix(features)
+    num_trees = booster.num_boosted_rounds()
+    full = booster.predict(dmatrix, output_margin=True).astype(np.float64)
+    full_probs = 1 / (1 + np.exp(-full))
+
+    biases = np.zeros(num_trees + 1)
+    curve: List[Optional[Dict[str, float]]] = [None]
+    for k in range(1, num_trees + 1):
+        margin = booster.predict(dmatrix, output_margin=True, iteration_range=(0, k)).astype(np.float64)
+        if bias_correction:
+            biases[k] = float(np.mean(full - margin))
+        probs = 1 / (1 + np.exp(-(margin + biases[k])))
+        curve.append(fidelity(full_probs, probs))
+    return biases, curve
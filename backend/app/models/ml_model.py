@@ -1,10 +1,16 @@
 ﻿import xgboost as xgb
 import numpy as np
-from pathlib import Path
-from typing import Dict, Tuple
-from ..config import settings
+from typing import Dict, List, Tuple
+from ..config import settings, resolve_app_path
+from ..utils.feature_engineering import FeatureEngineer
+from .term1_table import Term1RiskTable
 import time
 import os
+import hashlib
+
+# ขอบระดับความเสี่ยง: Low < 0.3 <= Medium < 0.6 <= High (ใช้กับ np.digitize ได้โดยตรง)
+RISK_EDGES = (0.3, 0.6)
+RISK_LEVELS = ("Low", "Medium", "High")
 
 class DropoutPredictor:
     def __init__(self):
@@ -14,11 +20,15 @@ class DropoutPredictor:
             'term3': None
         }
         self.model_loaded = False
-        # ใช้เฉพาะโมเดลในโฟลเดอร์ dropout-prediction/XG
+        # digest ของไฟล์โมเดลที่โหลดอยู่ ใช้เป็น key ของ cache ผลลัพธ์
+        self.model_version = None
+        # ตารางความน่าจะเป็นของโมเดล term1 (ถ้าเปิดใช้ TERM1_TABLE_ENABLED)
+        self.term1_table = None
+        # ใช้เฉพาะโมเดลในโฟลเดอร์ dropout-prediction/XG (เปลี่ยนได้ด้วย MODEL_TERM*_PATH)
         self.model_paths = {
-            'term1': 'XG/model_term1.json',
-            'term2': 'XG/model_term2.json',
-            'term3': 'XG/model_term3.json'
+            'term1': settings.MODEL_TERM1_PATH,
+            'term2': settings.MODEL_TERM2_PATH,
+            'term3': settings.MODEL_TERM3_PATH
         }
         
         # Features สำหรับแต่ละ model (ตามที่ฝึก XGBoost)
@@ -62,12 +72,13 @@ class DropoutPredictor:
     def load_models(self, max_retries=3):
         """โหลด models ทั้งหมด"""
         loaded_count = 0
+        version_hash = hashlib.sha256()
         
         for term, model_path in self.model_paths.items():
             for attempt in range(max_retries):
                 try:
                     # สร้าง absolute path (ไปที่โฟลเดอร์ /app)
-                    abs_path = Path(__file__).parent.parent.parent / model_path
+                    abs_path = resolve_app_path(model_path)
                     print(f"🔄 Loading {term} model - Attempt {attempt + 1}/{max_retries}")
                     print(f"🔍 Looking for model at: {abs_path}")
                     print(f"✅ File exists: {abs_path.exists()}")
@@ -76,6 +87,8 @@ class DropoutPredictor:
                         print(f"📦 File size: {abs_path.stat().st_size} bytes")
                         self.models[term] = xgb.XGBClassifier()
                         self.models[term].load_model(str(abs_path))
+                        version_hash.update(term.encode())
+                        version_hash.update(abs_path.read_bytes())
                         loaded_count += 1
                         print(f"✅ {term} model loaded successfully!")
                         break
@@ -94,6 +107,7 @@ class DropoutPredictor:
         
         if loaded_count > 0:
             self.model_loaded = True
+            self.model_version = version_hash.hexdigest()[:12]
             print(f"✅ Successfully loaded {loaded_count}/3 models")
             return True
         else:
@@ -134,30 +148,106 @@ class DropoutPredictor:
         if model is None:
             raise RuntimeError(f"Model {model_key} not loaded")
         
+        # นักศึกษาเทอมแรก: ใช้ตารางที่คำนวณไว้แล้ว (ถ้า input อยู่ในช่วงของตาราง)
+        if model_key == 'term1' and self.term1_table is not None:
+            hit = self.term1_table.lookup(data)
+            if hit is not None:
+                return hit
+        
         print(f"🎯 Using {model_key} model for {num_terms} terms")
         
-        # เตรียม features สำหรับ model ที่เลือก
-        model_features = self.features[model_key]
-        features = []
+        X = np.array([self.feature_vector(data, model_key)])
+        pred = model.predict(X)[0]
+        prob = model.predict_proba(X)[0, 1]
         
-        for feature in model_features:
+        return int(pred), float(prob)
+    
+    def feature_vector(self, data: Dict, model_key: str) -> List[float]:
+        """เตรียม features สำหรับ model ที่เลือก"""
+        features = []
+        for feature in self.features[model_key]:
             value = data.get(feature, 0)
             if isinstance(value, (int, float)):
                 features.append(float(value))
             else:
                 features.append(0.0)
+        return features
+    
+    def predict_proba_batch(self, features, model_key: str) -> np.ndarray:
+        """ทำนายความน่าจะเป็นจาก DataFrame ของ features (หนึ่งแถวต่อนักศึกษา) ในครั้งเดียว"""
+        model = self.models[model_key]
+        if model is None:
+            raise RuntimeError(f"Model {model_key} not loaded")
+        X = features[self.features[model_key]].to_numpy(dtype=float)
+        return model.predict_proba(X)[:, 1]
+    
+    def predict_batch(self, features, num_terms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ทำนายหลายคนพร้อมกัน: แบ่งกลุ่มตาม model แล้วเรียกแต่ละ model ครั้งเดียว"""
+        num_terms = np.asarray(num_terms)
+        # เรียก get_model_for_term ครั้งเดียวต่อค่าจำนวนเทอมที่ต่างกัน
+        counts, inverse = np.unique(num_terms, return_inverse=True)
+        model_keys = np.array([self.get_model_for_term(int(n)) for n in counts])[inverse]
+        probs = np.empty(len(num_terms), dtype=float)
         
-        X = np.array([features])
-        pred = model.predict(X)[0]
-        prob = model.predict_proba(X)[0, 1]
+        for model_key in np.unique(model_keys):
+            mask = model_keys == model_key
+            group = features[mask]
+            if model_key == 'term1' and self.term1_table is not None:
+                group_probs = self.term1_table.lookup_batch(group)
+                miss = np.isnan(group_probs)
+                if miss.any():
+                    group_probs[miss] = self.predict_proba_batch(group[miss], model_key)
+            else:
+                group_probs = self.predict_proba_batch(group, model_key)
+            probs[mask] = group_probs
         
-        return int(pred), float(prob)
+        preds = (probs > 0.5).astype(int)
+        return preds, probs
+    
+    def load_term1_table(self) -> bool:
+        """โหลด (หรือสร้าง) ตาราง term1 แล้วตรวจความตรงกับโมเดลจริงก่อนใช้งาน"""
+        self.term1_table = None
+        if not settings.TERM1_TABLE_ENABLED or self.models['term1'] is None:
+            return False
+        
+        path = resolve_app_path(settings.TERM1_TABLE_PATH)
+        
+        table = None
+        if path.exists():
+            try:
+                table = Term1RiskTable.load(path)
+            except Exception as e:
+                print(f"❌ Cannot load term1 table {path}: {e}")
+            if table is not None and table.model_version != self.model_version:
+                print(f"⚠️ term1 table {path} was built for model {table.model_version}, current is {self.model_version}")
+                table = None
+        
+        feature_engineer = FeatureEngineer()
+        if table is None:
+            if not settings.TERM1_TABLE_BUILD_ON_STARTUP:
+                print("⚠️ term1 table not available, using term1 model")
+                return False
+            print(f"🔄 Building term1 table (max count_f {settings.TERM1_TABLE_MAX_COUNT_F})")
+            table = Term1RiskTable.build(self, feature_engineer, settings.TERM1_TABLE_MAX_COUNT_F)
+            try:
+                table.save(path)
+            except OSError as e:
+                print(f"⚠️ Cannot save term1 table {path}: {e}")
+        
+        error = table.parity_check(self, feature_engineer, settings.TERM1_TABLE_PARITY_SAMPLES)
+        if error > settings.TERM1_TABLE_PARITY_TOLERANCE:
+            print(f"❌ term1 table parity check failed (max error {error:.2e}), using term1 model")
+            return False
+        
+        self.term1_table = table
+        print(f"✅ term1 table loaded (max error {error:.2e})")
+        return True
     
     def get_risk(self, prob):
         """ประเมินระดับความเสี่ยง"""
-        if prob < 0.3: 
+        if prob < RISK_EDGES[0]: 
             return "Low", "green"
-        elif prob < 0.6: 
+        elif prob < RISK_EDGES[1]: 
             return "Medium", "orange"
         else: 
             return "High", "red"
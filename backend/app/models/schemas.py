@@ -83,3 +83,75 @@ class HealthResponse(BaseModel):
     model_loaded: bool
     loaded_terms: Dict[str, bool]
     loaded_count: int
+
+class LaneStats(BaseModel):
+    workers: int
+    queue_depth: int
+    running: int
+    completed: int
+    wait_ms_avg: float
+    wait_ms_p99: float
+    latency_budget_ms: Optional[float] = None
+    over_budget: int
+    yields: int
+
+class SchedulerStatsResponse(BaseModel):
+    lanes: Dict[str, LaneStats]
+
+class FeatureSummary(BaseModel):
+    count: int
+    missing: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    quantiles: Dict[str, Optional[float]]
+
+class FeatureDrift(BaseModel):
+    psi: Optional[float] = None
+    status: str
+    live: FeatureSummary
+    reference: Optional[FeatureSummary] = None
+
+class DriftReferenceInfo(BaseModel):
+    model_config = {"protected_namespaces": ()}
+
+    rows: int
+    model_version: Optional[str] = None
+    created_at: str
+
+class DriftReport(BaseModel):
+    """สถานะ drift ของ features เทียบกับ reference (PSI: <0.1 คงที่, 0.1-0.25 เปลี่ยนบ้าง, >=0.25 เปลี่ยนมาก)"""
+    status: str
+    live_rows: int
+    live_batches: int
+    live_since: str
+    reference: Optional[DriftReferenceInfo] = None
+    features: Dict[str, FeatureDrift]
+
+class CohortStats(BaseModel):
+    count: int
+    mean_probability: Optional[float] = None
+    risk_distribution: Dict[str, int]
+    has_F: int
+    declining_trend: int
+    probability_histogram: List[int]
+
+class CohortGroup(CohortStats):
+    faculty: str
+    gender: str
+    num_terms: int
+
+class CohortSummary(BaseModel):
+    overall: CohortStats
+    by_faculty: Dict[str, CohortStats]
+    by_gender: Dict[str, CohortStats]
+    by_num_terms: Dict[str, CohortStats]
+    groups: List[CohortGroup]
+
+class BatchCohortResponse(BaseModel):
+    """สถิติรายกลุ่มของผลทำนาย batch (probability_histogram: 10 ช่วงเท่ากันของความน่าจะเป็น 0-1)"""
+    result_id: Optional[str] = None
+    count: int
+    invalid_count: int
+    cohort: CohortSummary
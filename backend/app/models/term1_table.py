@@ -0,0 +1,155 @@
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# GPA รายงานเป็นทศนิยม 2 ตำแหน่ง: 0.00 - 4.00
+GPA_STEPS = 100
+GPA_SIZE = 4 * GPA_STEPS + 1
+NUM_FACULTIES = 7
+NUM_GENDERS = 2
+
+
+class Term1RiskTable:
+    """
+    ตารางความน่าจะเป็นที่คำนวณล่วงหน้าสำหรับโมเดล term1
+    โมเดล term1 ขึ้นกับ คณะ, เพศ, gpax, count_f และ GPA เทอม 1 เท่านั้น
+    จึงแจกแจงได้ทุกค่า -> ใช้ array indexing แทนการเรียก booster
+    แกนของตาราง: [faculty, gender, count_f, gpax * 100, term1 * 100]
+    """
+
+    def __init__(self, probs: np.ndarray, model_version: Optional[str]):
+        self.probs = probs
+        self.model_version = model_version
+        self.max_count_f = probs.shape[2] - 1
+
+    @classmethod
+    def build(cls, predictor, feature_engineer, max_count_f: int) -> "Term1RiskTable":
+        """สร้างตารางจากโมเดล term1 ที่โหลดอยู่ (ทีละ slice เพื่อไม่ให้ใช้หน่วยความจำมาก)"""
+        grid = np.arange(GPA_SIZE) / GPA_STEPS
+        gpax, term1 = np.meshgrid(grid, grid, indexing="ij")
+        gpax = gpax.ravel()
+        term1 = term1.ravel()
+        n = len(gpax)
+
+        probs = np.empty(
+            (NUM_FACULTIES, NUM_GENDERS, max_count_f + 1, GPA_SIZE, GPA_SIZE),
+            dtype=np.float32
+        )
+        for fac in range(NUM_FACULTIES):
+            for gender in range(NUM_GENDERS):
+                for count_f in range(max_count_f + 1):
+                    features = feature_engineer.create_model_features_batch(
+                        faculty_codes=np.full(n, fac),
+                        gender_codes=np.full(n, gender),
+                        gpax=gpax,
+                        count_f=np.full(n, count_f),
+                        term_gpas=term1[:, None],
+                        current_term=1
+                    )
+                    probs[fac, gender, count_f] = predictor.predict_proba_batch(
+                        features, "term1"
+                    ).reshape(GPA_SIZE, GPA_SIZE)
+
+        return cls(probs, predictor.model_version)
+
+    @classmethod
+    def load(cls, path: Path) -> "Term1RiskTable":
+        with np.load(path, allow_pickle=False) as data:
+            version = str(data["model_version"])
+            return cls(data["probs"], version or None)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            probs=self.probs,
+            model_version=np.array(self.model_version or "")
+        )
+
+    @staticmethod
+    def _gpa_index(value: float) -> Optional[int]:
+        scaled = value * GPA_STEPS
+        idx = int(round(scaled))
+        if abs(scaled - idx) > 1e-6 or idx < 0 or idx >= GPA_SIZE:
+            return None
+        return idx
+
+    def lookup(self, data: Dict) -> Optional[Tuple[int, float]]:
+        """คืน (prediction, probability) หรือ None ถ้า input อยู่นอกช่วงของตาราง (ให้ใช้โมเดลแทน)"""
+        # ต้องมีเฉพาะ GPA เทอม 1 และเป็นการทำนายเทอมแรก
+        if data.get("TERM1_missing") != 0 or data.get("current_term") != 1:
+            return None
+        if any(data.get(f"TERM{i}_missing") != 1 for i in range(2, 9)):
+            return None
+        if data.get("COUNT_WIU", 0) != 0:
+            return None
+
+        fac = data.get("FAC_ENCODED")
+        gender = data.get("GENDER_ENCODED")
+        count_f = data.get("COUNT_F")
+        if fac not in range(NUM_FACULTIES) or gender not in range(NUM_GENDERS):
+            return None
+        if count_f not in range(self.max_count_f + 1):
+            return None
+
+        gpax_idx = self._gpa_index(data.get("OLD_GPA_M6", -1))
+        term1_idx = self._gpa_index(data.get("TERM1", -1))
+        if gpax_idx is None or term1_idx is None:
+            return None
+
+        prob = float(self.probs[int(fac), int(gender), int(count_f), gpax_idx, term1_idx])
+        return int(prob > 0.5), prob
+
+    def lookup_batch(self, features) -> np.ndarray:
+        """เวอร์ชัน vectorized ของ lookup: คืน probability ต่อแถว (NaN = อยู่นอกตาราง ให้ใช้โมเดลแทน)"""
+        hit = (features["TERM1_missing"].to_numpy() == 0) & (features["current_term"].to_numpy() == 1)
+        for i in range(2, 9):
+            hit &= features[f"TERM{i}_missing"].to_numpy() == 1
+        hit &= features["COUNT_WIU"].to_numpy() == 0
+
+        indices = []
+        for column, size in (("FAC_ENCODED", NUM_FACULTIES),
+                             ("GENDER_ENCODED", NUM_GENDERS),
+                             ("COUNT_F", self.max_count_f + 1)):
+            values = features[column].to_numpy(dtype=float)
+            hit &= (values == np.floor(values)) & (values >= 0) & (values < size)
+            indices.append(values)
+        for column in ("OLD_GPA_M6", "TERM1"):
+            scaled = features[column].to_numpy(dtype=float) * GPA_STEPS
+            idx = np.rint(scaled)
+            hit &= (np.abs(scaled - idx) <= 1e-6) & (idx >= 0) & (idx < GPA_SIZE)
+            indices.append(idx)
+
+        probs = np.full(len(features), np.nan)
+        probs[hit] = self.probs[tuple(values[hit].astype(int) for values in indices)]
+        return probs
+
+    def parity_check(self, predictor, feature_engineer, samples: int, seed: int = 0) -> float:
+        """เทียบค่าในตารางกับโมเดลจริงแบบสุ่ม คืนค่าความคลาดเคลื่อนสูงสุด"""
+        rng = np.random.default_rng(seed)
+        faculties = list(feature_engineer.faculty_mapping)
+        genders = list(feature_engineer.gender_mapping)
+        model = predictor.models["term1"]
+        max_error = 0.0
+        for _ in range(samples):
+            fac = int(rng.integers(NUM_FACULTIES))
+            gender = int(rng.integers(NUM_GENDERS))
+            count_f = int(rng.integers(self.max_count_f + 1))
+            gpax = int(rng.integers(GPA_SIZE)) / GPA_STEPS
+            term1 = int(rng.integers(GPA_SIZE)) / GPA_STEPS
+
+            features = feature_engineer.create_model_features(
+                faculty=faculties[fac],
+                gender=genders[gender],
+                gpax=gpax,
+                count_f=count_f,
+                term_gpas=[term1],
+                current_term=1
+            )
+            hit = self.lookup(features)
+            if hit is None:
+                return float("inf")
+            X = np.array([predictor.feature_vector(features, "term1")])
+            live_prob = float(model.predict_proba(X)[0, 1])
+            max_error = max(max_error, abs(hit[1] - live_prob))
+        return max_error
@@ -0,0 +1,53 @@
+"""
+สร้าง drift reference จากไฟล์ข้อมูลนักศึกษา (เช่น ชุดข้อมูลที่ใช้ train โมเดล) แล้วบันทึกไว้ที่ DRIFT_REFERENCE_PATH
+
+    python -m app.tools.build_drift_reference training_roster.csv
+"""
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from ..config import settings
+from ..core.drift import DriftMonitor
+from ..models.ml_model import predictor
+from ..utils.batch_scoring import build_features
+from ..utils.batch_validation import missing_columns, validate_batch
+from ..utils.feature_engineering import FeatureEngineer
+from ..utils.feature_sketch import FeatureSketch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the feature drift reference sketch")
+    parser.add_argument("input", help="CSV or XLSX file in the batch-predict format")
+    parser.add_argument("--output", default=settings.DRIFT_REFERENCE_PATH)
+    args = parser.parse_args()
+
+    path = Path(args.input)
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        df = pd.read_excel(path, engine="openpyxl")
+    else:
+        df = pd.read_csv(path)
+
+    missing = missing_columns(df)
+    if missing:
+        raise SystemExit(f"Missing columns: {', '.join(missing)}")
+
+    feature_engineer = FeatureEngineer()
+    clean_df, errors = validate_batch(df, feature_engineer)
+    if errors:
+        print(f"⚠️ Skipped {len(errors)} invalid rows")
+
+    sketch = FeatureSketch()
+    if len(clean_df):
+        features, _ = build_features(clean_df, feature_engineer)
+        sketch.update(features)
+
+    # model_version บันทึกไว้เพื่ออ้างอิงว่า reference สร้างคู่กับโมเดลชุดไหน
+    predictor.load_models()
+    info = DriftMonitor(args.output).save_reference(sketch, predictor.model_version)
+    print(f"📦 Saved drift reference ({info['rows']} rows) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
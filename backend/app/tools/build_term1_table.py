@@ -0,0 +1,41 @@
+"""
+สร้างตาราง term1 แบบ offline แล้วบันทึกไว้ที่ TERM1_TABLE_PATH
+
+    python -m app.tools.build_term1_table --max-count-f 3
+"""
+import argparse
+import time
+
+from ..config import settings, resolve_app_path
+from ..models.ml_model import predictor
+from ..models.term1_table import Term1RiskTable
+from ..utils.feature_engineering import FeatureEngineer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed term1 risk table")
+    parser.add_argument("--output", default=settings.TERM1_TABLE_PATH)
+    parser.add_argument("--max-count-f", type=int, default=settings.TERM1_TABLE_MAX_COUNT_F)
+    parser.add_argument("--parity-samples", type=int, default=settings.TERM1_TABLE_PARITY_SAMPLES)
+    args = parser.parse_args()
+
+    if not predictor.load_models() or predictor.models["term1"] is None:
+        raise SystemExit("term1 model not loaded")
+
+    feature_engineer = FeatureEngineer()
+    start = time.perf_counter()
+    table = Term1RiskTable.build(predictor, feature_engineer, args.max_count_f)
+    print(f"✅ Built table {table.probs.shape} in {time.perf_counter() - start:.1f}s")
+
+    error = table.parity_check(predictor, feature_engineer, args.parity_samples)
+    print(f"🔍 Parity max error over {args.parity_samples} samples: {error:.2e}")
+    if error > settings.TERM1_TABLE_PARITY_TOLERANCE:
+        raise SystemExit("Parity check failed, table not saved")
+
+    output = resolve_app_path(args.output)
+    table.save(output)
+    print(f"📦 Saved {output} ({output.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+ลดขนาดโมเดลของเทอมหนึ่ง (ตัดต้นไม้ท้าย ๆ, dead branch และ split ซ้ำซ้อน) ภายใต้งบความคลาดเคลื่อนที่กำหนด
+แล้วบันทึกเป็นไฟล์ JSON ที่ DropoutPredictor โหลดได้ทันที
+
+    python -m app.tools.compact_model --term term3 --max-prob-error 0.02 --max-band-disagreement 0.005
+    python -m app.tools.compact_model --term term2 --reference roster.csv --prune-unreached
+
+ใช้โมเดลที่ได้โดยตั้ง MODEL_TERM3_PATH=XG/model_term3_compact.json (หรือ MODEL_TERM1_PATH / MODEL_TERM2_PATH)
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..config import resolve_app_path
+from ..models import compaction
+from ..models.ml_model import predictor
+from ..utils.batch_scoring import build_features
+from ..utils.batch_validation import missing_columns, validate_batch
+from ..utils.feature_engineering import FeatureEngineer
+
+# จำนวนเทอมที่มีเกรดของ roster จำลองสำหรับแต่ละโมเดล
+SYNTHETIC_TERMS = {"term1": (1, 1), "term2": (2, 2), "term3": (3, 10)}
+
+
+def synthetic_features(term: str, n: int, seed: int, feature_engineer: FeatureEngineer) -> pd.DataFrame:
+    """roster จำลองที่ครอบคลุมช่วงค่าของ input (คณะ, เพศ, gpax, count_f, GPA รายเทอม)"""
+    rng = np.random.default_rng(seed)
+    low, high = SYNTHETIC_TERMS[term]
+    num_terms = rng.integers(low, high + 1, n)
+
+    gpax = np.round(rng.uniform(0.0, 4.0, n), 2)
+    # ครึ่งหนึ่ง GPA รายเทอมกระจายรอบ gpax (มีทั้งแนวโน้มขึ้นและลง) อีกครึ่งสุ่มอิสระทั้งช่วง 0-4
+    around_gpax = np.clip(gpax[:, None] + rng.normal(0, 0.6, (n, 10)), 0, 4)
+    independent = rng.uniform(0.0, 4.0, (n, 10))
+    terms = np.round(np.where(rng.random(n)[:, None] < 0.5, around_gpax, independent), 2)
+    terms[np.arange(10)[None, :] >= num_terms[:, None]] = np.nan
+    count_f = np.minimum(rng.geometric(0.45, n) - 1, 15).astype(float)
+
+    return feature_engineer.create_model_features_batch(
+        faculty_codes=rng.integers(0, len(set(feature_engineer.faculty_mapping.values())), n),
+        gender_codes=rng.integers(0, 2, n),
+        gpax=gpax,
+        count_f=count_f,
+        term_gpas=terms,
+        current_term=np.clip(num_terms, 1, 3)
+    )
+
+
+def csv_features(term: str, path: Path, feature_engineer: FeatureEngineer) -> pd.DataFrame:
+    """features จากไฟล์รูปแบบเดียวกับ batch-predict เฉพาะแถวที่ถูกส่งให้โมเดลของเทอมนี้"""
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        df = pd.read_excel(path, engine="openpyxl")
+    else:
+        df = pd.read_csv(path)
+    missing = missing_columns(df)
+    if missing:
+        raise SystemExit(f"Missing columns: {', '.join(missing)}")
+
+    clean_df, _ = validate_batch(df, feature_engineer)
+    features, num_terms = build_features(clean_df, feature_engineer)
+    routed = np.array([predictor.get_model_for_term(int(k)) == term for k in num_terms], dtype=bool)
+    return features[routed]
+
+
+def _timing(clfs, features: pd.DataFrame, rounds: int = 15) -> list:
+    """
+    เวลาทำนายทั้ง batch และต่อหนึ่งแถวของแต่ละโมเดล (ค่าน้อยที่สุด)
+    วัดสลับกันทีละรอบเพื่อให้ทุกโมเดลเจอสภาพเครื่องเดียวกัน
+    """
+    row = features.iloc[:1]
+    batch = [[] for _ in clfs]
+    single = [[] for _ in clfs]
+    for _ in range(rounds):
+        for i, clf in enumerate(clfs):
+            start = time.perf_counter()
+            clf.predict_proba(features)
+            batch[i].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            clf.predict_proba(row)
+            single[i].append(time.perf_counter() - start)
+    return [{"batch_ms": min(b) * 1000, "row_ms": min(s) * 1000} for b, s in zip(batch, single)]
+
+
+def _print_fidelity(label: str, result: dict):
+    print(
+        f"   {label:<12} max_err={result['max_error']:.4f} mean_err={result['mean_error']:.5f} "
+        f"band_disagree={result['band_disagreement'] * 100:.2f}% label_flips={result['label_flips']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a term model within a fidelity budget")
+    parser.add_argument("--term", required=True, choices=list(SYNTHETIC_TERMS))
+    parser.add_argument("--reference", help="CSV/XLSX roster used as reference features (default: synthetic)")
+    parser.add_argument("--samples", type=int, default=20000, help="synthetic reference rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-prob-error", type=float, default=0.02)
+    parser.add_argument("--max-band-disagreement", type=float, default=0.005)
+    parser.add_argument("--leaf-tolerance", type=float, default=0.0,
+                        help="merge sibling leaves whose values differ by at most this (0 = lossless only)")
+    parser.add_argument("--prune-unreached", action="store_true",
+                        help="drop branches that no reference row reaches (requires --reference)")
+    parser.add_argument("--no-bias-correction", action="store_true")
+    parser.add_argument("--output", help="default: XG/model_<term>_compact.json")
+    args = parser.parse_args()
+    # roster จำลองไม่ครอบคลุมข้อมูลจริงทุกแบบ (เช่น count_f > 15) และ holdout มาจากตัวสร้างเดียวกัน
+    # งบความคลาดเคลื่อนจึงตรวจกิ่งที่ถูกตัดไม่ได้ -> ตัดกิ่งที่ไม่มีข้อมูลผ่านได้เฉพาะกับ roster จริง
+    if args.prune_unreached and not args.reference:
+        parser.error("--prune-unreached requires --reference (a real roster)")
+
+    source = resolve_app_path(predictor.model_paths[args.term])
+    original = compaction.load_model_json(source)
+    original_clf = compaction.classifier_from_json(original)
+    print(f"📦 {source.name}: {compaction.model_stats(original)}")
+
+    feature_engineer = FeatureEngineer()
+    # reference แบ่งเป็นชุดที่ใช้เลือกวิธีตัด (fit) กับชุดที่ใช้ตรวจงบ (holdout)
+    # เพราะกิ่งที่ถูกตัดเนื่องจากไม่มีข้อมูลผ่าน จะไม่เปลี่ยนผลของแถวในชุด fit เลย
+    if args.reference:
+        features = csv_features(args.term, Path(args.reference), feature_engineer)
+        order = np.random.default_rng(args.seed).permutation(len(features))
+        split = int(len(features) * 0.8)
+        fit, holdout = features.iloc[order[:split]], features.iloc[order[split:]]
+    else:
+        fit = synthetic_features(args.term, args.samples, args.seed, feature_engineer)
+        holdout = synthetic_features(args.term, args.samples // 4, args.seed + 1, feature_engineer)
+    columns = predictor.features[args.term]
+    fit, holdout = fit[columns].astype(float), holdout[columns].astype(float)
+    if len(fit) == 0 or len(holdout) == 0:
+        raise SystemExit(f"Not enough reference rows for {args.term}")
+    print(f"🔍 Reference: {len(fit)} fit + {len(holdout)} holdout rows ({'file' if args.reference else 'synthetic'})")
+
+    # 1) ต้นไม้น้อยที่สุดที่ยังอยู่ในงบ
+    biases, curve = compaction.truncation_curve(original_clf, fit, not args.no_bias_correction)
+    num_trees = len(curve) - 1
+    keep = next(
+        k for k in range(1, num_trees + 1)
+        if curve[k]["max_error"] <= args.max_prob_error
+        and curve[k]["band_disagreement"] <= args.max_band_disagreement
+    )
+    print("🌲 Trees kept vs fidelity:")
+    for k in sorted({*range(10, num_trees + 1, 10), keep}):
+        _print_fidelity(f"{k} trees" + (" *" if k == keep else ""), curve[k])
+
+    # 2) ตัด dead branch / split ซ้ำซ้อน ในต้นไม้ที่เหลือ
+    truncated = compaction.truncate(original, keep, biases[keep])
+    coverage = fit.to_numpy() if args.prune_unreached else None
+    candidates = {
+        "truncated": truncated,
+        "simplified": compaction.simplify_trees(truncated, args.leaf_tolerance, coverage),
+    }
+    clfs = {name: compaction.classifier_from_json(model) for name, model in candidates.items()}
+
+    # 3) ตรวจผลของไฟล์ที่จะบันทึกจริงกับชุด holdout และวัดเวลาเทียบกับโมเดลเดิม
+    # tree ตื้นที่สมบูรณ์ (leaf ลึกเท่ากันทุกกิ่ง) อาจทำนายเร็วกว่าหลังตัดกิ่ง จึงวัดจริงแล้วเลือก
+    reference_probs = original_clf.predict_proba(holdout)[:, 1].astype(np.float64)
+    timings = _timing([original_clf, *clfs.values()], fit)
+    rows = {"original": (original, None, timings[0])}
+    for (name, model), clf, timing in zip(candidates.items(), clfs.values(), timings[1:]):
+        probs = clf.predict_proba(holdout)[:, 1].astype(np.float64)
+        rows[name] = (model, compaction.fidelity(reference_probs, probs), timing)
+
+    print(f"📊 Result (batch = {len(fit)} rows, fidelity on holdout):")
+    for name, (model, result, timing) in rows.items():
+        stats = compaction.model_stats(model)
+        print(
+            f"   {name:<11} trees={stats['trees']} nodes={stats['nodes']} bytes={stats['bytes']} "
+            f"batch={timing['batch_ms']:.1f}ms row={timing['row_ms']:.3f}ms"
+        )
+        if result is not None:
+            _print_fidelity("", result)
+
+    passing = [
+        name for name in candidates
+        if rows[name][1]["max_error"] <= args.max_prob_error
+        and rows[name][1]["band_disagreement"] <= args.max_band_disagreement
+    ]
+    if not passing:
+        raise SystemExit("Compacted model exceeds the fidelity budget, not saved")
+    # เร็วที่สุด ถ้าต่างกันไม่เกิน 5% เลือกตัวที่มี node น้อยกว่า
+    fastest = min(rows[name][2]["batch_ms"] for name in passing)
+    chosen = min(
+        (name for name in passing if rows[name][2]["batch_ms"] <= fastest * 1.05),
+        key=lambda name: compaction.model_stats(rows[name][0])["nodes"]
+    )
+
+    chosen_stats = compaction.model_stats(rows[chosen][0])
+    original_stats = compaction.model_stats(original)
+    if (chosen_stats["trees"], chosen_stats["nodes"]) == (original_stats["trees"], original_stats["nodes"]):
+        print("ℹ️ No compaction within budget: the original model is already the smallest, nothing saved")
+        return
+
+    output_path = args.output or f"XG/model_{args.term}_compact.json"
+    output = resolve_app_path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(compaction.dumps_model(rows[chosen][0]))
+    print(f"✅ Saved {chosen} model to {output}")
+    print(f"   ใช้งาน: MODEL_{args.term.upper()}_PATH={output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from .batch_validation import term_columns
+from .cohort_summary import CohortSummary
+from .feature_sketch import FeatureSketch
+
+
+def build_features(df: pd.DataFrame, feature_engineer) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    สร้าง features ของทุกแถว (ที่ผ่าน validate_batch แล้ว) ในครั้งเดียว
+    คืน (DataFrame ของ features, จำนวนเทอมที่มีข้อมูลของแต่ละแถว)
+    """
+    terms = df[term_columns(df)].to_numpy(dtype=float)
+    num_terms = (~np.isnan(terms)).sum(axis=1)
+    current_term = np.clip(num_terms, 1, 3)
+
+    features = feature_engineer.create_model_features_batch(
+        faculty_codes=df["faculty"].map(feature_engineer.faculty_mapping).to_numpy(),
+        gender_codes=df["gender"].map(feature_engineer.gender_mapping).to_numpy(),
+        gpax=df["gpax"].to_numpy(dtype=float),
+        count_f=df["count_f"].to_numpy(dtype=float),
+        term_gpas=terms,
+        current_term=current_term
+    )
+    return features, num_terms
+
+
+def optional_column(df: pd.DataFrame, column: str) -> List[Any]:
+    if column not in df.columns:
+        return [None] * len(df)
+    values = df[column].astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def score_students(
+    df: pd.DataFrame,
+    predictor,
+    feature_engineer,
+    sketch: Optional[FeatureSketch] = None,
+    cohort: Optional[CohortSummary] = None
+) -> List[Dict[str, Any]]:
+    """
+    ทำนายทุกแถวในครั้งเดียว (เรียกแต่ละโมเดลครั้งเดียวต่อ batch) แล้วสร้างผลลัพธ์รายแถว
+    ถ้าส่ง sketch มาด้วย จะเพิ่ม features ของ batch นี้ลงใน sketch (ใช้ติดตาม drift)
+    ถ้าส่ง cohort มาด้วย จะเพิ่มผลทำนายลงในสถิติรายกลุ่ม
+    """
+    if len(df) == 0:
+        return []
+
+    features, num_terms = build_features(df, feature_engineer)
+    if sketch is not None:
+        sketch.update(features)
+    preds, probs = predictor.predict_batch(features, num_terms)
+    if cohort is not None:
+        cohort.update(features, num_terms, probs)
+    explanations = feature_engineer.get_feature_explanation_batch(features)
+
+    student_ids = optional_column(df, "student_id")
+    names = optional_column(df, "name")
+
+    results: List[Dict[str, Any]] = []
+    for i, idx in enumerate(df.index):
+        pred = int(preds[i])
+        prob = float(probs[i])
+        risk, color = predictor.get_risk(prob)
+        results.append({
+            "row_index": int(idx),
+            "student_id": student_ids[i],
+            "name": names[i],
+            "prediction": pred,
+            "prediction_label": "Dropout" if pred == 1 else "Graduate",
+            "dropout_probability": prob,
+            "dropout_percentage": f"{prob*100:.1f}%",
+            "risk_level": risk,
+            "risk_color": color,
+            "feature_explanations": explanations[i],
+        })
+    return results
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+# Only required to column year4_term2, year5_term1/year5_term2 optional
+REQUIRED_COLUMNS = [
+    "faculty", "gender", "gpax", "count_f",
+    "year1_term1", "year1_term2", "year2_term1", "year2_term2",
+    "year3_term1", "year3_term2", "year4_term1", "year4_term2"
+]
+TERM_COLUMNS = [f"year{year}_term{term}" for year in range(1, 6) for term in (1, 2)]
+# จำนวน F สูงสุดที่รับ (ค่าที่มากกว่านี้ถือว่ากรอกผิด และต้องไม่ล้นตอนแปลงเป็น int)
+MAX_COUNT_F = 100
+
+
+def missing_columns(df: pd.DataFrame) -> List[str]:
+    return [c for c in REQUIRED_COLUMNS if c not in df.columns]
+
+
+def term_columns(df: pd.DataFrame) -> List[str]:
+    """คอลัมน์ GPA รายเทอมที่มีในไฟล์ (year5_term1/year5_term2 อาจไม่มี)"""
+    return [c for c in TERM_COLUMNS if c in df.columns]
+
+
+def _is_blank(series: pd.Series) -> pd.Series:
+    blank = series.isna()
+    if series.dtype == object:
+        # เฉพาะคอลัมน์ข้อความที่อาจมีช่องว่าง (คอลัมน์ตัวเลขไม่ต้องแปลงเป็น str)
+        blank |= series.astype(str).str.strip() == ""
+    return blank
+
+
+def validate_batch(df: pd.DataFrame, feature_engineer) -> Tuple[pd.DataFrame, List[Dict]]:
+    """
+    ตรวจข้อมูลทั้งไฟล์แบบ column-wise (ไม่วนทีละแถว)
+    คืน (DataFrame ของแถวที่ถูกต้องพร้อมแปลงชนิดข้อมูลแล้ว, รายการ error ต่อแถว)
+    error แต่ละรายการอยู่ในรูป {"row_index": ..., "errors": {column: message}}
+    """
+    n = len(df)
+    checks: List[Tuple[str, np.ndarray, pd.Series]] = []
+    clean = df.copy()
+
+    def add(column: str, mask: pd.Series, message):
+        mask = mask.to_numpy(dtype=bool)
+        if mask.any():
+            texts = message if isinstance(message, pd.Series) else pd.Series(message, index=df.index)
+            checks.append((column, mask, texts))
+
+    # faculty / gender ต้องอยู่ใน mapping ของ FeatureEngineer
+    for column, mapping in (("faculty", feature_engineer.faculty_mapping),
+                            ("gender", feature_engineer.gender_mapping)):
+        blank = _is_blank(df[column])
+        values = df[column].astype(str).str.strip()
+        clean[column] = values
+        add(column, blank, "is required")
+        add(column, ~blank & ~values.isin(list(mapping)), "unknown value: " + values)
+
+    # gpax: 0 - 4
+    blank = _is_blank(df["gpax"])
+    gpax = pd.to_numeric(df["gpax"], errors="coerce")
+    not_number = ~blank & gpax.isna()
+    add("gpax", blank, "is required")
+    add("gpax", not_number, "must be a number")
+    add("gpax", gpax.notna() & ((gpax < 0) | (gpax > 4)), "must be between 0 and 4")
+    clean["gpax"] = gpax
+
+    # count_f: จำนวนเต็มที่ไม่ติดลบ
+    blank = _is_blank(df["count_f"])
+    count_f = pd.to_numeric(df["count_f"], errors="coerce")
+    add("count_f", blank, "is required")
+    add("count_f", ~blank & count_f.isna(), "must be a number")
+    integer = np.isfinite(count_f) & (count_f >= 0) & (count_f == np.floor(count_f))
+    add("count_f", count_f.notna() & ~integer, "must be a non-negative integer")
+    add("count_f", integer & (count_f > MAX_COUNT_F), f"must be at most {MAX_COUNT_F}")
+    clean["count_f"] = count_f
+
+    # GPA รายเทอม: ว่างได้, ถ้ามีต้องอยู่ระหว่าง 0 - 4
+    for column in term_columns(df):
+        blank = _is_blank(df[column])
+        gpa = pd.to_numeric(df[column], errors="coerce")
+        add(column, ~blank & gpa.isna(), "must be a number")
+        add(column, gpa.notna() & ((gpa < 0) | (gpa > 4)), "must be between 0 and 4")
+        clean[column] = gpa.where(~blank)
+
+    invalid = np.zeros(n, dtype=bool)
+    for _, mask, _ in checks:
+        invalid |= mask
+
+    errors: List[Dict] = []
+    if invalid.any():
+        positions = np.flatnonzero(invalid)
+        row_errors = {int(p): {} for p in positions}
+        for column, mask, texts in checks:
+            for p in np.flatnonzero(mask):
+                row_errors[int(p)].setdefault(column, str(texts.iloc[p]))
+        errors = [
+            {"row_index": int(df.index[p]), "errors": row_errors[int(p)]}
+            for p in positions
+        ]
+
+    clean = clean.loc[~invalid].astype({"count_f": int})
+    return clean, errors
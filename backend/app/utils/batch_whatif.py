@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional
+from .batch_scoring import build_features, optional_column
+from .batch_validation import TERM_COLUMNS, term_columns
+
+# ค้นหาบน grid ของ GPA ทีละ 0.01 (เก็บเป็นจำนวนเต็ม 0-400)
+GPA_STEPS = 100
+GPA_MAX = 4 * GPA_STEPS
+# จำนวนค่า GPA ที่ลองพร้อมกันต่อคนในแต่ละรอบ (25 = ช่วงละ 0.25)
+BLOCK_STEPS = 25
+# โมเดลใช้ GPA ได้ถึงเทอม 8
+MODEL_TERMS = 8
+
+
+def _required_gpa_slice(
+    df: pd.DataFrame,
+    predictor,
+    feature_engineer,
+    threshold: float,
+    checkpoint: Optional[Callable[[], None]] = None
+) -> List[Dict[str, Any]]:
+    n = len(df)
+    terms = np.full((n, len(TERM_COLUMNS)), np.nan)
+    for column in term_columns(df):
+        terms[:, TERM_COLUMNS.index(column)] = df[column].to_numpy(dtype=float)
+
+    # เทอมถัดไป = ช่องถัดจากเทอมสุดท้ายที่มีเกรด
+    filled = ~np.isnan(terms)
+    last = np.where(filled.any(axis=1), len(TERM_COLUMNS) - 1 - filled[:, ::-1].argmax(axis=1), -1)
+    next_slot = last + 1
+
+    features, num_terms = build_features(df, feature_engineer)
+    _, current_probs = predictor.predict_batch(features, num_terms)
+
+    faculty_codes = df["faculty"].map(feature_engineer.faculty_mapping).to_numpy()
+    gender_codes = df["gender"].map(feature_engineer.gender_mapping).to_numpy()
+    gpax = df["gpax"].to_numpy(dtype=float)
+    count_f = df["count_f"].to_numpy(dtype=float)
+
+    def probs_at(rows: np.ndarray, steps: np.ndarray) -> np.ndarray:
+        """ความน่าจะเป็นเมื่อ rows[i] ได้ GPA steps[i] / 100 ในเทอมถัดไป (ทำนายทุก scenario ในครั้งเดียว)"""
+        scenario = terms[rows]
+        scenario[np.arange(len(rows)), next_slot[rows]] = steps / GPA_STEPS
+        future_terms = num_terms[rows] + 1
+        scenario_features = feature_engineer.create_model_features_batch(
+            faculty_codes=faculty_codes[rows],
+            gender_codes=gender_codes[rows],
+            gpax=gpax[rows],
+            count_f=count_f[rows],
+            term_gpas=scenario,
+            current_term=np.clip(future_terms, 1, 3)
+        )
+        _, probs = predictor.predict_batch(scenario_features, future_terms)
+        return probs
+
+    searchable = np.flatnonzero(next_slot < MODEL_TERMS)
+    required = np.full(n, -1)
+    required_probs = np.full(n, np.nan)
+
+    # ไล่จาก 0.00 ขึ้นไปทีละช่วง: ทุกคนที่ยังหาไม่เจอ x ทุกค่าในช่วง ทำนายพร้อมกันในรอบเดียว
+    # ค่าแรกที่ต่ำกว่าเกณฑ์คือคำตอบ (ไม่ใช้ bisection เพราะความเสี่ยงไม่ได้ลดลงตาม GPA เสมอไป)
+    unresolved = searchable
+    for start in range(0, GPA_MAX + 1, BLOCK_STEPS):
+        if len(unresolved) == 0:
+            break
+        # แต่ละรอบทำนาย (จำนวนคน x 25) แถว -> หยุดให้งาน interactive ระหว่างรอบ ไม่ใช่แค่ระหว่าง slice
+        if checkpoint is not None:
+            checkpoint()
+        steps = np.arange(start, min(start + BLOCK_STEPS, GPA_MAX + 1))
+        probs = probs_at(
+            np.repeat(unresolved, len(steps)), np.tile(steps, len(unresolved))
+        ).reshape(len(unresolved), len(steps))
+        below = probs < threshold
+        hit = below.any(axis=1)
+        first = below[hit].argmax(axis=1)
+        required[unresolved[hit]] = steps[first]
+        required_probs[unresolved[hit]] = probs[hit, first]
+        unresolved = unresolved[~hit]
+
+    student_ids = optional_column(df, "student_id")
+    names = optional_column(df, "name")
+
+    results: List[Dict[str, Any]] = []
+    for i, idx in enumerate(df.index):
+        prob = float(current_probs[i])
+        risk, color = predictor.get_risk(prob)
+        has_next = next_slot[i] < MODEL_TERMS
+        if not has_next:
+            status = "no_next_term"
+        elif required[i] < 0:
+            status = "unreachable"
+        elif prob < threshold:
+            status = "already_below"
+        else:
+            status = "reachable"
+        results.append({
+            "row_index": int(idx),
+            "student_id": student_ids[i],
+            "name": names[i],
+            "current_probability": prob,
+            "current_risk_level": risk,
+            "current_risk_color": color,
+            "next_term": TERM_COLUMNS[next_slot[i]] if has_next else None,
+            "required_gpa": float(required[i]) / GPA_STEPS if required[i] >= 0 else None,
+            "probability_at_required": float(required_probs[i]) if required[i] >= 0 else None,
+            "status": status,
+        })
+    return results
+
+
+def required_gpa(
+    df: pd.DataFrame,
+    predictor,
+    feature_engineer,
+    threshold: float,
+    slice_rows: int,
+    checkpoint: Optional[Callable[[], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    หา GPA ขั้นต่ำ (ทีละ 0.01) ในเทอมถัดไปที่ทำให้ความน่าจะเป็นที่จะ dropout ต่ำกว่า threshold ของทุกแถว
+    เหมือนเรียก /predict-future ทุกค่า GPA แต่ทำนายทุกคนพร้อมกันในแต่ละรอบของการค้นหา
+    - status: reachable, already_below (ตอนนี้ต่ำกว่าเกณฑ์แล้ว; required_gpa คือเกรดขั้นต่ำที่ยังต่ำกว่าเกณฑ์),
+      unreachable (ไม่มีเกรด 0.00-4.00 ใดต่ำกว่าเกณฑ์), no_next_term (มีเกรดครบ 8 เทอมที่โมเดลใช้แล้ว)
+    """
+    results: List[Dict[str, Any]] = []
+    for start in range(0, len(df), slice_rows):
+        if checkpoint is not None:
+            checkpoint()
+        results.extend(_required_gpa_slice(
+            df.iloc[start:start + slice_rows], predictor, feature_engineer, threshold, checkpoint
+        ))
+    return results
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List
+
+from ..models.ml_model import RISK_EDGES, RISK_LEVELS
+
+# จำนวนเทอมที่มีเกรด 0-10 (year1_term1 - year5_term2)
+MAX_TERMS = 10
+HISTOGRAM_BINS = 10
+
+# ค่าที่เก็บต่อกลุ่ม: จำนวน, ผลรวมความน่าจะเป็น, has_F, declining_trend, ระดับความเสี่ยง 3 ระดับ, histogram
+_COUNT, _PROB_SUM, _HAS_F, _DECLINING = range(4)
+_RISK = 4
+_HIST = _RISK + len(RISK_LEVELS)
+_WIDTH = _HIST + HISTOGRAM_BINS
+
+
+class CohortSummary:
+    """
+    สถิติรายกลุ่ม (คณะ x เพศ x จำนวนเทอม) ของผลทำนาย batch
+    เก็บเป็น array ขนาดคงที่ -> update ด้วย bincount รอบเดียวต่อ batch และรวมหลาย shard ได้ด้วยการบวก
+    """
+
+    def __init__(self, feature_engineer):
+        self.faculties = self._labels(feature_engineer.faculty_mapping)
+        self.genders = self._labels(feature_engineer.gender_mapping)
+        self.shape = (len(self.faculties), len(self.genders), MAX_TERMS + 1)
+        self.cells = np.zeros((int(np.prod(self.shape)), _WIDTH))
+
+    @staticmethod
+    def _labels(mapping: Dict[str, int]) -> List[str]:
+        labels = [""] * (max(mapping.values()) + 1)
+        for name, code in mapping.items():
+            labels[code] = name
+        return labels
+
+    def update(self, features: pd.DataFrame, num_terms: np.ndarray, probs: np.ndarray) -> None:
+        cell = np.ravel_multi_index(
+            (
+                features["FAC_ENCODED"].to_numpy(dtype=int),
+                features["GENDER_ENCODED"].to_numpy(dtype=int),
+                np.minimum(num_terms, MAX_TERMS),
+            ),
+            self.shape
+        )
+        risk = np.digitize(probs, RISK_EDGES)
+        hist = np.minimum((probs * HISTOGRAM_BINS).astype(int), HISTOGRAM_BINS - 1)
+
+        size = len(self.cells)
+        self.cells[:, _COUNT] += np.bincount(cell, minlength=size)
+        self.cells[:, _PROB_SUM] += np.bincount(cell, weights=probs, minlength=size)
+        self.cells[:, _HAS_F] += np.bincount(cell, weights=features["has_F"].to_numpy(), minlength=size)
+        self.cells[:, _DECLINING] += np.bincount(cell, weights=features["declining_trend"].to_numpy(), minlength=size)
+        # (กลุ่ม, ค่า) -> index เดียว แล้ว bincount ครั้งเดียว
+        self.cells[:, _RISK:_HIST] += np.bincount(
+            cell * len(RISK_LEVELS) + risk, minlength=size * len(RISK_LEVELS)
+        ).reshape(size, len(RISK_LEVELS))
+        self.cells[:, _HIST:] += np.bincount(
+            cell * HISTOGRAM_BINS + hist, minlength=size * HISTOGRAM_BINS
+        ).reshape(size, HISTOGRAM_BINS)
+
+    def merge(self, other: "CohortSummary") -> None:
+        self.cells += other.cells
+
+    @staticmethod
+    def _stats(row: np.ndarray) -> Dict[str, Any]:
+        count = int(row[_COUNT])
+        return {
+            "count": count,
+            "mean_probability": float(row[_PROB_SUM] / count) if count else None,
+            "risk_distribution": {level: int(v) for level, v in zip(RISK_LEVELS, row[_RISK:_HIST])},
+            "has_F": int(row[_HAS_F]),
+            "declining_trend": int(row[_DECLINING]),
+            "probability_histogram": [int(v) for v in row[_HIST:]],
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        สรุปรวม, แยกตามคณะ / เพศ / จำนวนเทอม และทุกกลุ่มย่อยที่มีนักศึกษา
+        probability_histogram แบ่งความน่าจะเป็นเป็น 10 ช่วงเท่ากัน (0-0.1, ..., 0.9-1.0)
+        """
+        cube = self.cells.reshape(*self.shape, _WIDTH)
+
+        def rollup(axis: int, labels) -> Dict[str, Any]:
+            other_axes = tuple(a for a in range(3) if a != axis)
+            totals = cube.sum(axis=other_axes)
+            return {str(labels[i]): self._stats(totals[i]) for i in range(len(totals)) if totals[i, _COUNT]}
+
+        groups = []
+        for index in np.flatnonzero(self.cells[:, _COUNT]):
+            faculty, gender, terms = np.unravel_index(index, self.shape)
+            groups.append({
+                "faculty": self.faculties[faculty],
+                "gender": self.genders[gender],
+                "num_terms": int(terms),
+                **self._stats(self.cells[index]),
+            })
+
+        return {
+            "overall": self._stats(self.cells.sum(axis=0)),
+            "by_faculty": rollup(0, self.faculties),
+            "by_gender": rollup(1, self.genders),
+            "by_num_terms": rollup(2, range(MAX_TERMS + 1)),
+            "groups": groups,
+        }
@@ -191,6 +191,156 @@ class FeatureEngineer:
 
         return features
     
+    def create_model_features_batch(
+        self,
+        faculty_codes: np.ndarray,
+        gender_codes: np.ndarray,
+        gpax: np.ndarray,
+        count_f: np.ndarray,
+        term_gpas: np.ndarray,
+        current_term
+    ) -> pd.DataFrame:
+        """
+        เวอร์ชัน vectorized ของ create_model_features สำหรับนักศึกษาหลายคนพร้อมกัน
+        - faculty_codes / gender_codes เป็นค่าที่ encode แล้ว (ตาม faculty_mapping / gender_mapping)
+        - term_gpas เป็น array ขนาด (n, จำนวนเทอม) ใช้ NaN แทนเทอมที่ไม่มีข้อมูล
+        ผลลัพธ์เป็น DataFrame หนึ่งแถวต่อนักศึกษา คอลัมน์ตรงกับ key ของ create_model_features
+        """
+        gpax = np.asarray(gpax, dtype=float)
+        count_f = np.asarray(count_f, dtype=float)
+        n = len(gpax)
+
+        # เตรียม term_gpas ความยาว 8
+        terms = np.full((n, 8), np.nan)
+        raw_terms = np.asarray(term_gpas, dtype=float).reshape(n, -1)[:, :8]
+        terms[:, :raw_terms.shape[1]] = raw_terms
+
+        missing = np.isnan(terms)
+        values = np.where(missing, 0.0, terms)
+        valid = ~missing & (values != 0)
+        n_valid = valid.sum(axis=1)
+        has_valid = n_valid > 0
+        safe_n = np.maximum(n_valid, 1)
+
+        avg_gpa = np.where(has_valid, self._masked_sum(values, valid) / safe_n, gpax)
+        min_gpa = np.where(has_valid, np.where(valid, values, np.inf).min(axis=1), 0.0)
+        max_gpa = np.where(has_valid, np.where(valid, values, -np.inf).max(axis=1), 0.0)
+        gpa_range = max_gpa - min_gpa
+        sq_dev = (values - avg_gpa[:, None]) ** 2
+        gpa_std = np.where(n_valid > 1, np.sqrt(self._masked_sum(sq_dev, valid) / safe_n), 0.0)
+
+        # เทอมแรก/เทอมล่าสุด/เทอมก่อนล่าสุดที่มีข้อมูล
+        rows = np.arange(n)
+        positions = np.arange(8)
+        first_idx = valid.argmax(axis=1)
+        last_idx = 7 - valid[:, ::-1].argmax(axis=1)
+        before_last = valid & (positions[None, :] < last_idx[:, None])
+        prev_idx = 7 - before_last[:, ::-1].argmax(axis=1)
+        first_gpa = values[rows, first_idx]
+        last_gpa = values[rows, last_idx]
+        prev_gpa = values[rows, prev_idx]
+
+        two_or_more = n_valid >= 2
+        gpa_change_from_start = np.where(two_or_more, last_gpa - first_gpa, 0.0)
+        improvement_from_hs = avg_gpa - gpax
+
+        has_F = (count_f > 0).astype(float)
+        multiple_F = (count_f >= 2).astype(float)
+        excessive_F = (count_f >= 3).astype(float)
+        has_WIU = np.zeros(n)  # ยังไม่มีข้อมูล WIU
+
+        very_low_gpa = (avg_gpa < 2.0).astype(float)
+        declining_trend = (gpa_change_from_start < -0.1).astype(float)
+
+        term = {f"TERM{i}": values[:, i - 1] for i in range(1, 9)}
+
+        positive = values > 0
+        num_terms_with_data = positive.sum(axis=1)
+        latest_idx = 7 - positive[:, ::-1].argmax(axis=1)
+        latest_available_gpa = np.where(num_terms_with_data > 0, values[rows, latest_idx], 0.0)
+
+        # performance_category (0-3) ตาม bins [0, 2.0, 2.5, 3.0, 4.1] ของ pd.cut
+        performance_category = np.select(
+            [
+                (avg_gpa >= 0) & (avg_gpa <= 2.0),
+                (avg_gpa > 2.0) & (avg_gpa <= 2.5),
+                (avg_gpa > 2.5) & (avg_gpa <= 3.0),
+                (avg_gpa > 3.0) & (avg_gpa <= 4.1),
+            ],
+            [0.0, 1.0, 2.0, 3.0],
+            default=0.0
+        )
+
+        features = {
+            **term,
+            **{f"TERM{i}_missing": missing[:, i - 1].astype(float) for i in range(1, 9)},
+            "OLD_GPA_M6": gpax,
+            "GENDER_ENCODED": np.asarray(gender_codes, dtype=float),
+            "FAC_ENCODED": np.asarray(faculty_codes, dtype=float),
+            "COUNT_F": count_f,
+            "COUNT_WIU": has_WIU,
+            "avg_gpa_up_to_now": avg_gpa,
+            "min_gpa_up_to_now": min_gpa,
+            "max_gpa_up_to_now": max_gpa,
+            "gpa_range": gpa_range,
+            "gpa_std": gpa_std,
+            "gpa_change_from_start": gpa_change_from_start,
+            "improvement_from_hs": improvement_from_hs,
+            "has_F": has_F,
+            "multiple_F": multiple_F,
+            "excessive_F": excessive_F,
+            "has_WIU": has_WIU,
+            "low_gpa": (avg_gpa < 2.5).astype(float),
+            "very_low_gpa": very_low_gpa,
+            "critical_gpa": (avg_gpa < 1.75).astype(float),
+            "early_warning": (term["TERM1"] < 2.0).astype(float),
+            "term1_low": (term["TERM1"] < 2.5).astype(float),
+            "term1_excellent": (term["TERM1"] >= 3.5).astype(float),
+            "term2_low": (term["TERM2"] < 2.5).astype(float),
+            "declining_trend": declining_trend,
+            "improving_trend": (gpa_change_from_start > 0.1).astype(float),
+            "decline_last_term": (two_or_more & (last_gpa < prev_gpa)).astype(float),
+            "consecutive_decline_2": ((term["TERM2"] < term["TERM1"]) & (term["TERM3"] < term["TERM2"])).astype(float),
+            "term3_low": (term["TERM3"] < 2.5).astype(float),
+            "num_terms_with_data": num_terms_with_data.astype(float),
+            "latest_available_gpa": latest_available_gpa,
+            "improving_term4": ((term["TERM4"] > term["TERM3"]) & (term["TERM3"] > 0)).astype(float),
+            "improving_term5": ((term["TERM5"] > term["TERM4"]) & (term["TERM4"] > 0)).astype(float),
+            "long_decline_3terms": (
+                (term["TERM4"] < term["TERM3"]) &
+                (term["TERM5"] < term["TERM4"]) &
+                (term["TERM6"] < term["TERM5"])
+            ).astype(float),
+            "overall_gpa_stability": 1 / (gpa_std + 0.1),
+            "has_recovered": ((min_gpa < 2.0) & (latest_available_gpa >= 2.5)).astype(float),
+            "performance_category": performance_category,
+            "risk_score": has_F * 2 + very_low_gpa * 3 + declining_trend * 2,
+            "current_term": np.broadcast_to(np.asarray(current_term, dtype=float), (n,)).copy()
+        }
+
+        # term4-8 low/excellent
+        for i in range(4, 9):
+            features[f"term{i}_low"] = (term[f"TERM{i}"] < 2.5).astype(float)
+            features[f"term{i}_excellent"] = (term[f"TERM{i}"] >= 3.5).astype(float)
+
+        return pd.DataFrame(features)
+
+    @staticmethod
+    def _masked_sum(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        ผลรวมรายแถวของค่าที่ mask เป็น True โดยบวกในลำดับเดียวกับ np.mean/np.std ของ list
+        (< 8 ค่าบวกเรียงตามลำดับ, ครบ 8 ค่าใช้ pairwise) เพื่อให้ผลตรงกับ create_model_features ทุกบิต
+        """
+        total = np.zeros(len(values))
+        for j in range(values.shape[1]):
+            total = total + np.where(mask[:, j], values[:, j], 0.0)
+        full = mask.all(axis=1)
+        if full.any():
+            v = values
+            pairwise = ((v[:, 0] + v[:, 1]) + (v[:, 2] + v[:, 3])) + ((v[:, 4] + v[:, 5]) + (v[:, 6] + v[:, 7]))
+            total = np.where(full, pairwise, total)
+        return total
+
     def predict_future_scenario(self, current_features: Dict[str, float], future_gpa: float, current_term: int) -> Dict[str, float]:
         """
         สร้าง features ใหม่เมื่อสมมติ GPA เทอมถัดไป
@@ -242,3 +392,42 @@ class FeatureEngineer:
             explanations['declining_trend'] = "แนวโน้มเกรดลดลงอย่างมีนัยสำคัญ"
         
         return explanations
+
+    def get_feature_explanation_batch(self, features: pd.DataFrame) -> List[Dict[str, str]]:
+        """
+        เวอร์ชัน vectorized ของ get_feature_explanation สำหรับ DataFrame จาก create_model_features_batch
+        """
+        n = len(features)
+        zeros = pd.Series(0.0, index=features.index)
+
+        def column(name):
+            return features[name] if name in features.columns else zeros
+
+        terms_with_data = sum((column(f"TERM{i}") > 0).astype(int) for i in range(1, 9))
+        gpa_delta = column('gpa_change_from_start')
+        gpa = column('GPA')
+        gpa_trend = column('gpa_trend')
+        count_f = column('COUNT_F')
+
+        messages = []
+        if (gpa > 0).any():
+            messages.append(('GPA', gpa > 0, "เกรดเฉลี่ยสะสม: " + gpa.map("{:.2f}".format)))
+        if (gpa_trend != 0).any():
+            trend_desc = np.where(gpa_trend > 0, "เพิ่มขึ้น", "ลดลง")
+            messages.append(('gpa_trend', gpa_trend != 0,
+                             "แนวโน้มเกรด: " + trend_desc + " " + gpa_trend.abs().map("{:.2f}".format)))
+        messages.append(('COUNT_F', count_f > 0,
+                         "จำนวนวิชาที่ได้ F: " + count_f.astype(int).astype(str) + " วิชา"))
+        messages.append(('has_f', column('has_f') == 1, "มีประวัติได้เกรด F"))
+        messages.append(('early_warning', column('early_warning') == 1, "มีสัญญาณเตือน: เกรดต่ำและมี F"))
+        messages.append(('declining_trend',
+                         (column('declining_trend') == 1) & (terms_with_data >= 3) & (gpa_delta <= -0.3),
+                         "แนวโน้มเกรดลดลงอย่างมีนัยสำคัญ"))
+
+        explanations = [{} for _ in range(n)]
+        for key, mask, text in messages:
+            mask = mask.to_numpy(dtype=bool)
+            texts = text.to_numpy() if isinstance(text, pd.Series) else None
+            for p in np.flatnonzero(mask):
+                explanations[p][key] = texts[p] if texts is not None else text
+        return explanations
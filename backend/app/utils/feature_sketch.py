@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional
+
+CONTINUOUS = "continuous"
+ORDINAL = "ordinal"
+CATEGORICAL = "categorical"
+
+# feature -> (ขอบของ bin, ชนิด) ; ordinal/categorical ใช้ bin ละหนึ่งค่าจำนวนเต็ม
+# ขอบ bin คงที่ -> หน่วยความจำคงที่ และรวม sketch จากหลาย batch/process ได้ด้วยการบวก counts
+SKETCH_FEATURES = {
+    "avg_gpa_up_to_now": (np.linspace(0.0, 4.0, 81), CONTINUOUS),
+    "OLD_GPA_M6": (np.linspace(0.0, 4.0, 81), CONTINUOUS),
+    "COUNT_F": (np.arange(22) - 0.5, ORDINAL),
+    "num_terms_with_data": (np.arange(10) - 0.5, ORDINAL),
+    "FAC_ENCODED": (np.arange(8) - 0.5, CATEGORICAL),
+    "GENDER_ENCODED": (np.arange(3) - 0.5, CATEGORICAL),
+}
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# ป้องกัน log(0) ใน PSI เมื่อ bin ใดไม่มีข้อมูล
+PSI_EPSILON = 1e-4
+
+
+class FeatureSketch:
+    """
+    Histogram ขนาดคงที่ของ features หลัก + count/mean/std/min/max
+    bin แรกและ bin สุดท้ายเก็บค่าที่ต่ำกว่า/สูงกว่าช่วงที่กำหนด
+    quantile ประมาณจาก histogram (ละเอียดเท่าความกว้างของ bin เช่น 0.05 สำหรับ GPA)
+    """
+
+    def __init__(self):
+        self.counts = {name: np.zeros(len(edges) + 1, dtype=np.int64) for name, (edges, _) in SKETCH_FEATURES.items()}
+        self.stats = {
+            name: {"count": 0, "missing": 0, "sum": 0.0, "sum_sq": 0.0, "min": None, "max": None}
+            for name in SKETCH_FEATURES
+        }
+        self.rows = 0
+
+    def update(self, features: pd.DataFrame) -> None:
+        """เพิ่มข้อมูลจาก feature matrix ของ batch (หนึ่งรอบ vectorized ต่อ feature)"""
+        self.rows += len(features)
+        for name, (edges, _) in SKETCH_FEATURES.items():
+            if name not in features.columns:
+                continue
+            values = features[name].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            v = values[valid]
+
+            stats = self.stats[name]
+            stats["missing"] += int(len(values) - len(v))
+            if len(v) == 0:
+                continue
+
+            idx = np.searchsorted(edges, v, side="right")
+            # ค่าที่เท่ากับขอบบนสุดพอดี (เช่น GPA 4.00) อยู่ใน bin สุดท้ายของช่วง
+            idx[v == edges[-1]] -= 1
+            self.counts[name] += np.bincount(idx, minlength=len(edges) + 1)
+
+            stats["count"] += int(len(v))
+            stats["sum"] += float(v.sum())
+            stats["sum_sq"] += float(np.square(v).sum())
+            low, high = float(v.min()), float(v.max())
+            stats["min"] = low if stats["min"] is None else min(stats["min"], low)
+            stats["max"] = high if stats["max"] is None else max(stats["max"], high)
+
+    def merge(self, other: "FeatureSketch") -> None:
+        self.rows += other.rows
+        for name in SKETCH_FEATURES:
+            self.counts[name] += other.counts[name]
+            stats, extra = self.stats[name], other.stats[name]
+            for key in ("count", "missing", "sum", "sum_sq"):
+                stats[key] += extra[key]
+            for key, pick in (("min", min), ("max", max)):
+                values = [v for v in (stats[key], extra[key]) if v is not None]
+                stats[key] = pick(values) if values else None
+
+    def quantiles(self, name: str) -> Dict[str, Optional[float]]:
+        edges, kind = SKETCH_FEATURES[name]
+        counts = self.counts[name]
+        stats = self.stats[name]
+        total = counts.sum()
+        if total == 0:
+            return {f"p{int(q * 100):02d}": None for q in QUANTILES}
+
+        cum = np.cumsum(counts)
+        result = {}
+        for q in QUANTILES:
+            target = q * total
+            b = int(np.searchsorted(cum, target, side="left"))
+            if b == 0:
+                value = stats["min"]
+            elif b == len(edges):
+                value = stats["max"]
+            elif kind != CONTINUOUS:
+                # ค่าจำนวนเต็มที่อยู่กลาง bin
+                value = (edges[b - 1] + edges[b]) / 2
+            else:
+                # interpolate ภายใน bin [edges[b-1], edges[b])
+                before = cum[b] - counts[b]
+                fraction = (target - before) / counts[b]
+                value = edges[b - 1] + fraction * (edges[b] - edges[b - 1])
+                value = min(max(value, stats["min"]), stats["max"])
+            result[f"p{int(q * 100):02d}"] = round(float(value), 4)
+        return result
+
+    def summary(self, name: str) -> Dict[str, Any]:
+        stats = self.stats[name]
+        n = stats["count"]
+        mean = stats["sum"] / n if n else None
+        std = float(np.sqrt(max(stats["sum_sq"] / n - mean ** 2, 0.0))) if n else None
+        return {
+            "count": n,
+            "missing": stats["missing"],
+            "mean": mean,
+            "std": std,
+            "min": stats["min"],
+            "max": stats["max"],
+            "quantiles": self.quantiles(name),
+        }
+
+    def psi(self, reference: "FeatureSketch", name: str, bins: int) -> Optional[float]:
+        """
+        Population Stability Index เทียบกับ reference
+        feature ต่อเนื่อง/ordinal: รวม bin ที่ติดกันให้เหลือประมาณ `bins` กลุ่มที่มีสัดส่วนใน reference ใกล้เคียงกัน
+        (bin ละเอียดที่มีข้อมูลน้อยทำให้ PSI สูงเกินจริง) ส่วน categorical เทียบทีละค่า
+        """
+        current = self.counts[name].astype(float)
+        expected = reference.counts[name].astype(float)
+        if current.sum() == 0 or expected.sum() == 0:
+            return None
+        current /= current.sum()
+        expected /= expected.sum()
+
+        _, kind = SKETCH_FEATURES[name]
+        if kind != CATEGORICAL:
+            mass_before = np.cumsum(expected) - expected
+            groups = np.minimum((mass_before * bins).astype(int), bins - 1)
+            current = np.bincount(groups, weights=current, minlength=bins)
+            expected = np.bincount(groups, weights=expected, minlength=bins)
+
+        current = np.maximum(current, PSI_EPSILON)
+        expected = np.maximum(expected, PSI_EPSILON)
+        return float(np.sum((current - expected) * np.log(current / expected)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "features": {
+                name: {
+                    "edges": SKETCH_FEATURES[name][0].tolist(),
+                    "counts": self.counts[name].tolist(),
+                    **self.stats[name],
+                }
+                for name in SKETCH_FEATURES
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeatureSketch":
+        """feature ที่ไม่มีในไฟล์หรือขอบ bin ไม่ตรงกับปัจจุบันจะถูกปล่อยว่าง"""
+        sketch = cls()
+        sketch.rows = int(data.get("rows", 0))
+        features = data.get("features", {})
+        for name, (edges, _) in SKETCH_FEATURES.items():
+            entry = features.get(name)
+            if not entry:
+                continue
+            stored_edges = np.asarray(entry.get("edges", []), dtype=float)
+            if stored_edges.shape != edges.shape or not np.allclose(stored_edges, edges):
+                continue
+            sketch.counts[name] = np.asarray(entry["counts"], dtype=np.int64)
+            sketch.stats[name] = {key: entry.get(key) for key in sketch.stats[name]}
+        return sketch
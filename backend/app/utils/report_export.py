@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from .result_cache import json_default
+
+BASE_COLUMNS = [
+    "row_index", "student_id", "name", "prediction_label",
+    "dropout_probability", "dropout_percentage", "risk_level"
+]
+
+# สีพื้นของคอลัมน์ risk_level ตาม risk_color จาก predictor.get_risk
+RISK_FILLS = {
+    "green": PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
+    "orange": PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid"),
+    "red": PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
+}
+
+CSV_CHUNK_ROWS = 1000
+
+
+def explanation_columns(results: List[Dict[str, Any]]) -> List[str]:
+    """คอลัมน์คำอธิบาย features ตามลำดับที่พบครั้งแรก"""
+    columns: Dict[str, None] = {}
+    for result in results:
+        for key in result.get("feature_explanations") or {}:
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def _row(result: Dict[str, Any], extra_columns: List[str]) -> List[Any]:
+    explanations = result.get("feature_explanations") or {}
+    return [result.get(c) for c in BASE_COLUMNS] + [explanations.get(c) for c in extra_columns]
+
+
+def iter_csv(
+    results: List[Dict[str, Any]],
+    checkpoint: Optional[Callable[[], None]] = None
+) -> Iterator[bytes]:
+    """
+    สร้าง CSV ทีละช่วงแถว (ใช้กับ StreamingResponse) ไม่ต้องสร้างทั้งไฟล์ในหน่วยความจำ
+    checkpoint (ถ้ามี) ถูกเรียกระหว่างช่วง เช่น scheduler.checkpoint ให้งาน interactive ได้ทำก่อน
+    """
+    extra_columns = explanation_columns(results)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM ให้ Excel อ่านภาษาไทยถูกต้อง
+    buffer.write("\ufeff")
+    writer.writerow(BASE_COLUMNS + extra_columns)
+    for i, result in enumerate(results, start=1):
+        writer.writerow(_row(result, extra_columns))
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            if checkpoint is not None:
+                checkpoint()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_json(
+    data: Dict[str, Any],
+    checkpoint: Optional[Callable[[], None]] = None
+) -> Iterator[bytes]:
+    """
+    แปลงผล batch เป็น JSON ทีละช่วงของ results (json.dumps ทั้งก้อนถือ GIL จนเสร็จ)
+    ได้ JSON เหมือน JSONResponse(data) และค่าที่ json แปลงเองไม่ได้ (numpy, วันที่) แปลงแบบเดียวกับ cache
+    """
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=json_default)
+
+    yield b"{"
+    for n, (key, value) in enumerate(data.items()):
+        prefix = ("," if n else "") + dumps(key) + ":"
+        if key != "results":
+            yield (prefix + dumps(value)).encode("utf-8")
+            continue
+        yield (prefix + "[").encode("utf-8")
+        for start in range(0, len(value), CSV_CHUNK_ROWS):
+            if checkpoint is not None and start:
+                checkpoint()
+            chunk = dumps(value[start:start + CSV_CHUNK_ROWS])[1:-1]
+            yield (("," if start else "") + chunk).encode("utf-8")
+        yield b"]"
+    yield b"}"
+
+
+def write_xlsx(
+    results: List[Dict[str, Any]],
+    errors: List[Dict[str, Any]],
+    path: str,
+    checkpoint: Optional[Callable[[], None]] = None
+) -> None:
+    """
+    เขียน XLSX ด้วย write-only mode ของ openpyxl (เขียนทีละแถวลงไฟล์ชั่วคราว)
+    หน่วยความจำคงที่ไม่ขึ้นกับจำนวนแถว
+    """
+    extra_columns = explanation_columns(results)
+    risk_col = BASE_COLUMNS.index("risk_level")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("predictions")
+    header_font = Font(bold=True)
+
+    def header(sheet, columns):
+        cells = []
+        for column in columns:
+            cell = WriteOnlyCell(sheet, value=column)
+            cell.font = header_font
+            cells.append(cell)
+        sheet.append(cells)
+
+    header(ws, BASE_COLUMNS + extra_columns)
+    for i, result in enumerate(results, start=1):
+        if checkpoint is not None and i % CSV_CHUNK_ROWS == 0:
+            checkpoint()
+        row = _row(result, extra_columns)
+        fill = RISK_FILLS.get(result.get("risk_color"))
+        if fill is not None:
+            cell = WriteOnlyCell(ws, value=row[risk_col])
+            cell.fill = fill
+            row[risk_col] = cell
+        ws.append(row)
+
+    if errors:
+        error_ws = wb.create_sheet("errors")
+        header(error_ws, ["row_index", "column", "error"])
+        for error in errors:
+            for column, message in error["errors"].items():
+                error_ws.append([error["row_index"], column, message])
+
+    wb.save(path)
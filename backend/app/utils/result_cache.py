@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config import resolve_app_path
+
+
+def json_default(value):
+    # numpy scalars (เช่น student_id ที่อ่านจาก pandas) -> python type
+    if hasattr(value, "item"):
+        return value.item()
+    # วันที่/เวลา (เช่น pd.Timestamp จากช่องวันที่ใน XLSX) -> ISO 8601 เหมือน jsonable_encoder ของ FastAPI
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class BatchResultCache:
+    """
+    Cache ผลลัพธ์ของ batch upload บนดิสก์ โดยใช้ digest ของไฟล์ + เวอร์ชันโมเดลเป็น key
+    - ไฟล์ที่เหมือนกันจะตอบจาก cache โดยไม่ต้อง parse/ทำนายใหม่
+    - upload ที่เหมือนกันและกำลังประมวลผลอยู่จะรอผลเดียวกัน (คำนวณครั้งเดียว)
+    - จำกัดขนาดรวมของ cache และลบรายการที่ใช้ล่าสุดนานที่สุดก่อน (LRU ตาม mtime)
+    - อ่าน/เขียนไฟล์ใน thread pool (ผลของ batch ใหญ่อาจมีขนาดหลายสิบ MB) ไม่บล็อก event loop
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = resolve_app_path(cache_dir)
+        self.max_bytes = max_bytes
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(content: bytes, kind: str, model_version: Optional[str]) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        return f"{digest}_{kind}_{model_version or 'unknown'}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            # อัปเดต mtime เพื่อใช้เป็นลำดับ LRU
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def contains(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    async def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """get() ใน thread pool (เรียกจาก event loop)"""
+        return await run_in_threadpool(self.get, key)
+
+    async def store(self, key: str, payload: Dict[str, Any]) -> None:
+        """put() ใน thread pool (เรียกจาก event loop)"""
+        await run_in_threadpool(self.put, key, payload)
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        path = self._path(key)
+        # ชื่อไฟล์ชั่วคราวไม่ซ้ำกันแม้หลาย thread เขียน key เดียวกันพร้อมกัน (upload ซ้ำที่มาพร้อมกัน)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, default=json_default)
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError as e:
+            print(f"⚠️ Cannot write batch cache entry {key}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort(key=lambda e: e[0])
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """คืนผลจาก cache, รอผลของงานเดียวกันที่กำลังทำอยู่ หรือคำนวณใหม่แล้วเก็บลง cache"""
+        # งานเดียวกันที่กำลังทำอยู่ -> รอผลในหน่วยความจำ ไม่ต้องอ่านไฟล์
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        cached = await self.load(key)
+        if cached is not None:
+            return cached
+
+        # อาจมี request อื่นเริ่มคำนวณระหว่างที่รออ่านไฟล์
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # ไม่ให้ asyncio เตือนเมื่อไม่มีผู้รอ
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            # ระหว่างเขียนไฟล์ upload ซ้ำยังได้ผลจาก future โดยไม่ต้องอ่านไฟล์ที่ยังเขียนไม่เสร็จ
+            await self.store(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)